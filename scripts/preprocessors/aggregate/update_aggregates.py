@@ -0,0 +1,9 @@
+# Loading Dependencies =========================================================
+import sys
+
+from vchtools import cli
+
+
+# Run ==========================================================================
+if __name__ == "__main__":
+    cli.main(["consolidate", "aggregates", *sys.argv[1:]])
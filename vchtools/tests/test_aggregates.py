@@ -0,0 +1,128 @@
+import json
+import argparse
+
+from pathlib import Path
+
+from vchtools.aggregates import FacilityAggregates
+from vchtools.index import HashIndex
+from vchtools.commands.consolidate import update_aggregates
+from vchtools.profiler import Profiler
+
+FACILITY_ID = "5c3f7a52-6a0e-4b4e-9d07-8f8e0f3d8b11"
+OTHER_FACILITY_ID = "0e4d1c6a-1b7f-4a8e-8a58-3c2b9d3f6e22"
+REPORT_IDS = [f"00000000-0000-4000-8000-{i:012d}" for i in range(3)]
+
+
+def _report(id, date, critical=0):
+    return {
+        "id": id,
+        "inspectionDate": date,
+        "criticalInfractionCount": critical,
+        "nonCriticalInfractionCount": 1,
+    }
+
+
+def _entry(result, description="Food handling", critical=False):
+    return {
+        "result": result,
+        "category": {"description": description},
+        "isCritical": critical,
+    }
+
+
+def test_ingest_is_idempotent():
+    aggregates = FacilityAggregates()
+    reports = [_report(REPORT_IDS[0], "2023-03-01", critical=2)]
+    assert aggregates.ingest_reports(FACILITY_ID, reports) == 1
+    assert aggregates.ingest_reports(FACILITY_ID, reports) == 0
+    assert aggregates.ingest_entries(FACILITY_ID, REPORT_IDS[0], [_entry("NIC")])
+    assert not aggregates.ingest_entries(FACILITY_ID, REPORT_IDS[0], [_entry("NIC")])
+
+    assert aggregates.critical_by_year(FACILITY_ID) == {"2023": 2}
+    assert aggregates.result_counts(FACILITY_ID) == {"NIC": 1}
+    assert aggregates.categories["Food handling"]["NIC"] == 1
+
+
+def test_incremental_save_and_load(tmp_path):
+    with FacilityAggregates() as aggregates:
+        aggregates.ingest_reports(
+            FACILITY_ID, [_report(REPORT_IDS[0], "2023-03-01", critical=2)]
+        )
+        aggregates.ingest_reports(
+            OTHER_FACILITY_ID, [_report(REPORT_IDS[1], "2023-05-01")]
+        )
+        aggregates.save(tmp_path)
+
+    with FacilityAggregates.load(tmp_path) as aggregates:
+        assert aggregates.critical_by_year(FACILITY_ID) == {"2023": 2}
+        # Reports ingested before the save are still skipped
+        assert (
+            aggregates.ingest_reports(
+                FACILITY_ID,
+                [
+                    _report(REPORT_IDS[0], "2023-03-01", critical=2),
+                    _report(REPORT_IDS[2], "2024-01-10", critical=1),
+                ],
+            )
+            == 1
+        )
+        aggregates.save(tmp_path)
+
+    with FacilityAggregates.load(tmp_path) as aggregates:
+        assert aggregates.critical_by_year(FACILITY_ID) == {"2023": 2, "2024": 1}
+        assert set(aggregates.facility_ids()) == {FACILITY_ID, OTHER_FACILITY_ID}
+        # Rollups do not carry the ingested IDs
+        assert "ingestedReports" not in aggregates.facility(FACILITY_ID)
+
+
+def test_save_writes_only_modified_facilities(tmp_path):
+    with FacilityAggregates() as aggregates:
+        aggregates.ingest_reports(FACILITY_ID, [_report(REPORT_IDS[0], "2023-03-01")])
+        aggregates.ingest_reports(
+            OTHER_FACILITY_ID, [_report(REPORT_IDS[1], "2023-05-01")]
+        )
+        aggregates.save(tmp_path)
+
+    with FacilityAggregates.load(tmp_path) as aggregates:
+        aggregates.ingest_reports(FACILITY_ID, [_report(REPORT_IDS[2], "2024-01-10")])
+        aggregates.save(tmp_path)
+        segments = sorted(tmp_path.glob("aggregates.*.idx"))
+        assert len(segments) == 2
+
+    with HashIndex(segments[-1]) as segment:
+        assert list(segment.keys()) == [FACILITY_ID]
+
+
+def _write(path: Path, data) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f)
+
+
+def test_update_aggregates_tracks_sources_per_directory(tmp_path):
+    # The details and reports crawls may produce files with the same name
+    _write(
+        tmp_path / "details" / "a.json",
+        [{FACILITY_ID: [_report(REPORT_IDS[0], "2023-03-01")]}],
+    )
+    _write(
+        tmp_path / "reports" / "a.json",
+        [{FACILITY_ID: [[REPORT_IDS[0], [_entry("NM")]]]}],
+    )
+    (tmp_path / "references").mkdir()
+    _write(tmp_path / "references" / "glossary.json", {"NM": "Not met"})
+    args = argparse.Namespace(
+        details_dir=tmp_path / "details",
+        reports_dir=tmp_path / "reports",
+        output_dir=tmp_path,
+        references_dir=tmp_path / "references",
+        profiler=Profiler(enabled=False),
+    )
+
+    update_aggregates(args)
+    update_aggregates(args)
+
+    with FacilityAggregates.load(tmp_path) as aggregates:
+        assert aggregates.sources == {"details": {"a.json"}, "reports": {"a.json"}}
+        assert aggregates.facility(FACILITY_ID)["inspections"] == 1
+        assert aggregates.result_counts(FACILITY_ID) == {"NM": 1}
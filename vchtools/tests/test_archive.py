@@ -0,0 +1,65 @@
+import pytest
+
+from vchtools.archive import ArchiveWriter, ArchiveReader, index_path, rebuild_index
+
+ENDPOINT = "https://example.com/api/%s"
+
+
+def _write(path, n):
+    with ArchiveWriter(path) as writer:
+        for i in range(n):
+            writer.add(ENDPOINT, str(i), {"id": str(i), "value": i})
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "test.arc"
+    with ArchiveWriter(path) as writer:
+        writer.add(ENDPOINT, "a", b'{"id": "a"}')
+        writer.add(ENDPOINT, "b", {"id": "b"})
+
+    with ArchiveReader(path) as reader:
+        assert len(reader) == 2
+        assert reader.get(ENDPOINT, "a") == b'{"id": "a"}'
+        assert reader.load(ENDPOINT, "b") == {"id": "b"}
+        assert (ENDPOINT, "b") in reader
+        assert ("https://example.com/other/%s", "b") not in reader
+        with pytest.raises(KeyError):
+            reader.get(ENDPOINT, "c")
+
+
+def test_rebuild_missing_index(tmp_path):
+    path = tmp_path / "test.arc"
+    _write(path, 10)
+    index_path(path).unlink()
+
+    with ArchiveReader(path) as reader:
+        assert len(reader) == 10
+        assert reader.load(ENDPOINT, "7") == {"id": "7", "value": 7}
+
+
+def test_rebuild_truncated_archive(tmp_path):
+    path = tmp_path / "test.arc"
+    _write(path, 10)
+    with open(path, "r+b") as f:
+        f.truncate(path.stat().st_size - 1)
+
+    assert rebuild_index(path) == 9
+    with ArchiveReader(path) as reader:
+        assert reader.load(ENDPOINT, "8") == {"id": "8", "value": 8}
+        assert (ENDPOINT, "9") not in reader
+        assert [id for _, id, _ in reader.items()] == [str(i) for i in range(9)]
+
+
+def test_items_recover_endpoints_and_ids(tmp_path):
+    path = tmp_path / "test.arc"
+    other = "https://example.com/other/%s"
+    with ArchiveWriter(path) as writer:
+        writer.add(ENDPOINT, "a", b'{"id": "a"}')
+        writer.add(other, "é", b"[]")
+
+    with ArchiveReader(path) as reader:
+        assert list(reader) == [(ENDPOINT, "a"), (other, "é")]
+        assert list(reader.items()) == [
+            (ENDPOINT, "a", b'{"id": "a"}'),
+            (other, "é", b"[]"),
+        ]
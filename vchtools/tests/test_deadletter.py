@@ -0,0 +1,100 @@
+from vchtools.fetcher.deadletter import DeadLetterStore, RetryScheduler
+
+
+class FakeHandler(object):
+    """Resolves or records IDs in the store like `APIHandler.fetch` does."""
+
+    throttle = 0.0
+
+    def __init__(self, store, url="details", failing=()):
+        self.store = store
+        self.url = url
+        self.failing = set(failing)
+        self.calls = []
+
+    def fetch(self, id, attempt=1):
+        self.calls.append(id)
+        if id in self.failing:
+            self.store.record(id, self.url, ConnectionError("down"))
+            return
+        self.store.resolve(id)
+        yield {"id": id}
+
+
+def test_replay_after_reopen(tmp_path):
+    path = tmp_path / "dead_letters.jsonl"
+    store = DeadLetterStore(path)
+    store.record("a", "details", ConnectionError("down"), status=None)
+    store.record("a", "details", TimeoutError("slow"), status=None)
+    store.record("b", "details", ConnectionError("down"), status=503)
+    store.defer("a", 123.0)
+    store.resolve("b")
+
+    reopened = DeadLetterStore(path)
+    assert list(reopened.failures) == ["a"]
+    assert reopened.failures["a"]["attempts"] == 2
+    assert reopened.failures["a"]["error"] == "TimeoutError"
+    assert reopened.failures["a"]["nextAttempt"] == 123.0
+
+
+def test_compact_keeps_unresolved_failures(tmp_path):
+    path = tmp_path / "dead_letters.jsonl"
+    store = DeadLetterStore(path)
+    for id in "abc":
+        store.record(id, "details", ConnectionError("down"))
+    store.resolve("b")
+    store.compact()
+
+    assert len(path.read_text().splitlines()) == 2
+    assert DeadLetterStore(path).failures == store.failures
+
+
+def test_pending_and_due_scoping(tmp_path):
+    store = DeadLetterStore(tmp_path / "dead_letters.jsonl")
+    store.record("a", "details", ConnectionError("down"))
+    store.record("b", "details", ConnectionError("down"))
+    store.record("c", "reports", ConnectionError("down"))
+    store.defer("b", 2_000.0)
+
+    assert [f["id"] for f in store.pending(endpoint="details")] == ["a", "b"]
+    assert [f["id"] for f in store.pending(ids={"b", "c"})] == ["b", "c"]
+    assert store.due(now=1_000.0, endpoint="details") == ["a"]
+    assert store.due(now=3_000.0, endpoint="details") == ["a", "b"]
+
+
+def test_run_replays_only_scoped_failures(tmp_path):
+    store = DeadLetterStore(tmp_path / "dead_letters.jsonl")
+    for id, endpoint in (("a", "details"), ("b", "details"), ("c", "reports")):
+        store.record(id, endpoint, ConnectionError("down"))
+    handler = FakeHandler(store)
+
+    recovered = list(RetryScheduler(handler, store, base_delay=0).run(ids=["a", "c"]))
+
+    assert recovered == [{"a": {"id": "a"}}]
+    assert handler.calls == ["a"]
+    assert set(store.failures) == {"b", "c"}
+
+
+def test_run_gives_up_per_run_and_keeps_failures(tmp_path):
+    store = DeadLetterStore(tmp_path / "dead_letters.jsonl")
+    store.record("a", "details", ConnectionError("down"))
+    store.record("b", "details", ConnectionError("down"))
+    handler = FakeHandler(store, failing={"a"})
+    scheduler = RetryScheduler(handler, store, max_attempts=3, base_delay=0)
+
+    assert list(scheduler.run()) == [{"b": {"id": "b"}}]
+    assert handler.calls.count("a") == 3
+    assert handler.calls.count("b") == 1
+    assert "a" in store and store.failures["a"]["attempts"] == 4
+
+    # A later run retries the ID again once the outage is over
+    handler.failing.clear()
+    assert list(scheduler.run()) == [{"a": {"id": "a"}}]
+    assert len(store) == 0
+
+
+def test_backoff_is_bounded():
+    scheduler = RetryScheduler(None, None, base_delay=1.0, max_delay=10.0)
+    for attempts in range(1, 10):
+        delay = scheduler.backoff(attempts)
+        assert 0 <= delay <= min(10.0, 2 ** (attempts - 1))
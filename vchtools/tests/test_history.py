@@ -0,0 +1,85 @@
+from vchtools.history import HistoryIndex, to_timestamp
+
+FACILITY_ID = "f"
+
+
+def _report(id, date, rating, critical=0):
+    return {
+        "id": id,
+        "inspectionDate": date,
+        "criticalInfractionCount": critical,
+        "nonCriticalInfractionCount": 1,
+        "hazardScore": 10.0,
+        "hazardRating": rating,
+    }
+
+
+def _index():
+    index = HistoryIndex()
+    index.ingest(
+        FACILITY_ID,
+        [
+            _report("a", "2023-03-01T09:00:00", "High", critical=2),
+            _report("b", "2024-07-14T10:30:00", "Low"),
+        ],
+    )
+    return index
+
+
+def test_to_timestamp_end_of_day():
+    assert to_timestamp("2024-07-14", end_of_day=True) == to_timestamp(
+        "2024-07-14T23:59:59"
+    )
+    assert to_timestamp("2024-07-14T10:30", end_of_day=True) == to_timestamp(
+        "2024-07-14T10:30"
+    )
+
+
+def test_between_includes_end_date():
+    index = _index()
+    inspections = index.between(FACILITY_ID, "2023-01-01", "2024-07-14")
+    assert [i["hazardRating"] for i in inspections] == ["High", "Low"]
+    assert index.between(FACILITY_ID, "2023-03-02", "2024-07-13") == []
+    assert index.between("unknown", "2023-01-01", "2024-12-31") == []
+
+
+def test_hazard_rating_as_of():
+    index = _index()
+    assert index.hazard_rating(FACILITY_ID, "2023-02-28") is None
+    assert index.hazard_rating(FACILITY_ID, "2023-03-01") == "High"
+    assert index.hazard_rating(FACILITY_ID, "2024-07-13") == "High"
+    assert index.hazard_rating(FACILITY_ID, "2024-07-14") == "Low"
+    assert index.hazard_rating(FACILITY_ID, "2024-07-14T10:00") == "High"
+
+
+def test_out_of_order_append():
+    index = _index()
+    assert index.ingest(FACILITY_ID, [_report("c", "2023-11-20T12:00:00", "Moderate")])
+    dates = [
+        i["inspectionDate"]
+        for i in index.between(FACILITY_ID, "2000-01-01", "2030-01-01")
+    ]
+    assert dates == sorted(dates)
+    assert index.hazard_rating(FACILITY_ID, "2024-01-01") == "Moderate"
+
+
+def test_ingest_is_idempotent():
+    index = _index()
+    assert index.ingest(FACILITY_ID, [_report("a", "2023-03-01T09:00:00", "High")]) == 0
+    assert len(index.between(FACILITY_ID, "2000-01-01", "2030-01-01")) == 2
+
+
+def test_save_load_round_trip(tmp_path):
+    index = _index()
+    index.ingest("g", [_report("d", "2022-05-05T08:00:00", "Moderate", critical=1)])
+    index.sources.add("inspection_details.json")
+    index.save(tmp_path / "history.bin")
+
+    loaded = HistoryIndex.load(tmp_path / "history.bin")
+    for facility_id in (FACILITY_ID, "g"):
+        assert loaded.between(facility_id, "2000-01-01", "2030-01-01") == index.between(
+            facility_id, "2000-01-01", "2030-01-01"
+        )
+    assert loaded.sources == {"inspection_details.json"}
+    assert loaded.ingest(FACILITY_ID, [_report("b", "2024-07-14T10:30:00", "Low")]) == 0
+    assert loaded.ingest(FACILITY_ID, [_report("e", "2025-01-01T10:00:00", "Low")]) == 1
@@ -0,0 +1,124 @@
+import uuid
+
+from vchtools.index import (
+    HashIndex,
+    JoinIndex,
+    SegmentedIndex,
+    write_index,
+    encode_ids,
+    decode_ids,
+)
+
+NIL = str(uuid.UUID(int=0))
+
+
+def _colliding_keys(n):
+    # Keys sharing their first 8 bytes land in the same slot and are probed linearly
+    return [str(uuid.UUID(bytes=bytes(8) + i.to_bytes(8, "little"))) for i in range(n)]
+
+
+def test_lookup_round_trip(tmp_path):
+    mapping = {str(uuid.uuid4()): f"payload-{i}".encode() for i in range(100)}
+    write_index(tmp_path / "test.idx", mapping)
+
+    with HashIndex(tmp_path / "test.idx") as index:
+        assert len(index) == 100
+        for key, payload in mapping.items():
+            assert index.get(key) == payload
+        assert index.get(str(uuid.uuid4())) is None
+        assert set(index.keys()) == set(mapping)
+
+
+def test_probing_past_colliding_keys(tmp_path):
+    keys = _colliding_keys(5)
+    write_index(tmp_path / "test.idx", {key: key.encode() for key in keys[:4]})
+
+    with HashIndex(tmp_path / "test.idx") as index:
+        for key in keys[:4]:
+            assert index.get(key) == key.encode()
+        assert keys[4] not in index
+
+
+def test_nil_uuid_key(tmp_path):
+    keys = [NIL] + _colliding_keys(4)[1:]
+    write_index(tmp_path / "test.idx", {key: key.encode() for key in keys})
+
+    with HashIndex(tmp_path / "test.idx") as index:
+        for key in keys:
+            assert index.get(key) == key.encode()
+        assert set(index.keys()) == set(keys)
+
+
+def test_nil_uuid_absent(tmp_path):
+    write_index(tmp_path / "test.idx", {str(uuid.uuid4()): b"payload"})
+
+    with HashIndex(tmp_path / "test.idx") as index:
+        assert index.get(NIL) is None
+
+
+def test_empty_payload(tmp_path):
+    key = str(uuid.uuid4())
+    write_index(tmp_path / "test.idx", {key: b""})
+
+    with HashIndex(tmp_path / "test.idx") as index:
+        assert index.get(key) == b""
+
+
+def test_encode_decode_ids():
+    ids = [str(uuid.uuid4()) for _ in range(3)]
+    assert decode_ids(encode_ids(ids)) == ids
+
+
+def test_join_index(tmp_path):
+    facility_ids = [str(uuid.uuid4()) for _ in range(3)]
+    report_ids = [str(uuid.uuid4()) for _ in range(3)]
+    facilities = [
+        {"id": facility_ids[0], "community": "Vancouver"},
+        {"id": facility_ids[1], "community": "Vancouver"},
+        {"id": facility_ids[2], "community": "Richmond"},
+    ]
+    inspection_details = [
+        {facility_ids[0]: [{"id": report_ids[0]}, {"id": report_ids[1]}]},
+        {facility_ids[2]: [{"id": report_ids[2]}]},
+    ]
+    inspection_reports = [
+        {facility_ids[0]: [[report_ids[0], [{"result": "IC"}]]]},
+        {facility_ids[2]: [[report_ids[2], [{"result": "NIC"}]]]},
+    ]
+    JoinIndex.build(tmp_path, facilities, inspection_details, inspection_reports)
+
+    with JoinIndex(tmp_path) as index:
+        assert index.facility(facility_ids[2]) == facilities[2]
+        assert index.facility(str(uuid.uuid4())) is None
+        assert index.facilities_in("Vancouver") == facility_ids[:2]
+        assert index.facilities_in("Burnaby") == []
+        assert index.inspections(facility_ids[0]) == report_ids[:2]
+        assert list(index.entries_in("Richmond")) == [
+            (facility_ids[2], report_ids[2], {"result": "NIC"})
+        ]
+
+
+def test_segmented_index_newest_segment_wins(tmp_path):
+    a, b, c = (str(uuid.uuid4()) for _ in range(3))
+    with SegmentedIndex(tmp_path, "test") as index:
+        index.append({a: b"a1", b: b"b1"})
+        index.append({a: b"a2", c: b"c1"})
+        index.append({})
+        assert len(index) == 2
+
+    with SegmentedIndex(tmp_path, "test") as index:
+        assert index.get(a) == b"a2"
+        assert index.get(b) == b"b1"
+        assert index.get(NIL) is None
+        assert set(index.keys()) == {a, b, c}
+
+
+def test_segmented_index_compacts(tmp_path):
+    keys = [str(uuid.uuid4()) for _ in range(4)]
+    with SegmentedIndex(tmp_path, "test", max_segments=2) as index:
+        for i, key in enumerate(keys):
+            index.append({key: str(i).encode(), keys[0]: f"first-{i}".encode()})
+        assert len(index) <= 2
+        assert index.get(keys[0]) == b"first-3"
+        assert [index.get(key) for key in keys[1:]] == [b"1", b"2", b"3"]
+    assert len(list(tmp_path.glob("test.*.idx"))) <= 2
@@ -0,0 +1,58 @@
+import io
+import json
+
+import pytest
+
+from vchtools import projection as projection_module
+from vchtools.projection import Projection
+
+ENTRY = {
+    "id": "e",
+    "description": "A long description of the entry.",
+    "result": "NIC",
+    "category": {"id": "c", "description": "Sanitation"},
+    "isCritical": True,
+}
+
+
+def test_top_level_field_keeps_subobject():
+    projection = Projection(["category", "result"])
+    assert projection.apply([ENTRY]) == [
+        {"id": "e", "result": "NIC", "category": ENTRY["category"]}
+    ]
+
+
+def test_nested_path_applies_to_its_parent_only():
+    projection = Projection(["category.description"])
+    assert projection.apply([ENTRY]) == [
+        {"id": "e", "category": {"description": "Sanitation"}}
+    ]
+
+
+def test_envelope_is_kept():
+    projection = Projection(["result"])
+    document = (
+        '{"result": [{"id": "e", "result": "IC", "isCritical": false}], "total": 1}'
+    )
+    assert projection.loads(document) == {
+        "result": [{"id": "e", "result": "IC"}],
+        "total": 1,
+    }
+
+
+@pytest.mark.parametrize("streamed", [True, False])
+def test_load_list_file(monkeypatch, streamed):
+    if streamed:
+        pytest.importorskip("ijson")
+    else:
+        monkeypatch.setattr(projection_module, "ijson", None)
+    projection = Projection(["category.description", "isCritical"])
+    document = [{"f": [ENTRY]}, ENTRY | {"score": 1.5}]
+    f = io.BytesIO(b"  " + json.dumps(document).encode("utf-8"))
+
+    assert projection.load(f) == projection.apply(document)
+    assert projection.load(io.BytesIO(json.dumps(ENTRY).encode("utf-8"))) == {
+        "id": "e",
+        "category": {"description": "Sanitation"},
+        "isCritical": True,
+    }
@@ -1,7 +1,21 @@
-from vchtools.fetcher import (
-    APIHandler,
-    GETRequestHandler,
-    POSTRequestHandler,
-    ThreadedGETRequestHandler,
-    ThreadedPOSTRequestHandler,
-)
+import importlib
+
+# The fetcher classes are resolved on first access, so importing `vchtools` or one
+# of its lighter submodules does not import `requests` and urllib3.
+_LAZY_ATTRIBUTES = {
+    "APIHandler": "vchtools.fetcher",
+    "DeadLetterStore": "vchtools.fetcher",
+    "GETRequestHandler": "vchtools.fetcher",
+    "POSTRequestHandler": "vchtools.fetcher",
+    "RetryScheduler": "vchtools.fetcher",
+    "ThreadedGETRequestHandler": "vchtools.fetcher",
+    "ThreadedPOSTRequestHandler": "vchtools.fetcher",
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        return getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
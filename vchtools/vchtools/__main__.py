@@ -0,0 +1,3 @@
+from vchtools.cli import main
+
+main()
@@ -0,0 +1,344 @@
+import json
+from pathlib import Path
+from collections import Counter
+from typing import Iterable, Optional, List, Dict, Set, Any
+
+from vchtools.index import SegmentedIndex
+
+NON_COMPLIANT_RESULTS = ("NIC", "NM")
+AGGREGATES_FILENAME = "aggregates.json"
+AGGREGATES_INDEX_NAME = "aggregates"
+INGESTED_INDEX_NAME = "ingested"
+SOURCE_KINDS = ("details", "reports")
+
+
+def load_glossary(glossary_path: Path) -> Dict[str, str]:
+    """Loads the result code glossary.
+
+    Args:
+        glossary_path (Path): The path to the glossary JSON file.
+
+    Returns:
+        dict: A mapping of result codes (e.g. "NIC") to their descriptions.
+    """
+    with open(glossary_path, "r") as f:
+        return json.load(f)
+
+
+class FacilityAggregates(object):
+    """Incrementally maintained per-facility and per-category rollups.
+
+    Reports and entries are folded into running counters as they are ingested, so
+    refreshing the rollups after a crawl only touches the new records. Ingestion is
+    idempotent: the IDs of the reports and entry lists folded into each facility are
+    kept, and those are skipped.
+
+    The facility rollups and the ingested IDs are saved in separate segmented hash
+    indexes keyed by facility ID. A save only writes the facilities that changed, and
+    a query reads a single rollup without the ingested IDs. The category rollups and
+    ingested source files are saved in a small JSON file.
+
+    Args:
+        glossary (dict): A mapping of result codes to descriptions. Entry results that
+            are not in the glossary are counted under "unknown". Defaults to None,
+            which accepts every result code.
+
+    Attributes:
+        categories (dict): The per-category rollups, keyed by category description.
+        sources (dict): The names of the ingested source files, per kind of file
+            ("details" or "reports").
+
+    Methods:
+        facility(facility_id): Returns the rollup of a facility.
+        facility_ids(): Returns the IDs of all facilities with a rollup.
+        ingest_reports(facility_id, reports): Folds inspection reports into the rollups.
+        ingest_entries(facility_id, report_id, entries): Folds report entries into the rollups.
+        critical_by_year(facility_id): Returns the critical infraction count per year.
+        most_common_category(facility_id): Returns the most frequent infraction category.
+        result_counts(facility_id): Returns the count of entries per result code.
+        save(directory): Saves the rollups to a directory.
+        load(directory): Loads the rollups from a directory.
+        close(): Unmaps the facility indexes.
+    """
+
+    def __init__(self, glossary: Optional[Dict[str, str]] = None):
+        self.glossary = glossary
+        self.categories: Dict[str, Dict[str, int]] = {}
+        self.sources: Dict[str, Set[str]] = {kind: set() for kind in SOURCE_KINDS}
+        self._facilities: Dict[str, Dict[str, Any]] = {}
+        self._ingested: Dict[str, Dict[str, Set[str]]] = {}
+        self._modified: Set[str] = set()
+        self._rollups: Optional[SegmentedIndex] = None
+        self._ingested_index: Optional[SegmentedIndex] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def facility(self, facility_id: str) -> Optional[Dict[str, Any]]:
+        """Returns the rollup of a facility, reading it from the index if needed.
+
+        Args:
+            facility_id (str): The ID of the facility.
+
+        Returns:
+            dict: The facility rollup, or None if the facility has no rollup.
+        """
+        if facility_id not in self._facilities:
+            payload = self._rollups.get(facility_id) if self._rollups else None
+            if payload is None:
+                return None
+            self._facilities[facility_id] = json.loads(payload)
+        return self._facilities[facility_id]
+
+    def facility_ids(self) -> List[str]:
+        """Returns the IDs of all facilities with a rollup.
+
+        Returns:
+            list: The facility IDs.
+        """
+        facility_ids = dict.fromkeys(self._rollups.keys() if self._rollups else [])
+        facility_ids.update(dict.fromkeys(self._facilities))
+        return list(facility_ids)
+
+    def _facility(self, facility_id: str) -> Dict[str, Any]:
+        facility = self.facility(facility_id)
+        if facility is None:
+            facility = self._facilities[facility_id] = {
+                "inspections": 0,
+                "years": {},
+                "results": {},
+                "categories": {},
+            }
+        self._modified.add(facility_id)
+        return facility
+
+    def _ingested_ids(self, facility_id: str) -> Dict[str, Set[str]]:
+        if facility_id not in self._ingested:
+            payload = (
+                self._ingested_index.get(facility_id) if self._ingested_index else None
+            )
+            ingested = json.loads(payload) if payload is not None else {}
+            self._ingested[facility_id] = {
+                kind: set(ingested.get(kind, [])) for kind in ("reports", "entries")
+            }
+        return self._ingested[facility_id]
+
+    def _result_code(self, result: str) -> str:
+        if self.glossary is None or result in self.glossary:
+            return result
+        return "unknown"
+
+    def ingest_reports(
+        self, facility_id: str, reports: Iterable[Dict[str, Any]]
+    ) -> int:
+        """Folds inspection reports into the rollups.
+
+        Args:
+            facility_id (str): The ID of the facility the reports belong to.
+            reports (iterable): The inspection reports, as returned by the inspection
+                details endpoint.
+
+        Returns:
+            int: The number of reports that had not been ingested before.
+        """
+        ingested = self._ingested_ids(facility_id)["reports"]
+        new_reports = {
+            report["id"]: report for report in reports if report["id"] not in ingested
+        }
+        if not new_reports:
+            return 0
+
+        facility = self._facility(facility_id)
+        ingested.update(new_reports)
+        for report in new_reports.values():
+            year = report["inspectionDate"][:4]
+            counts = facility["years"].setdefault(
+                year, {"inspections": 0, "critical": 0, "nonCritical": 0}
+            )
+            counts["inspections"] += 1
+            counts["critical"] += report["criticalInfractionCount"]
+            counts["nonCritical"] += report["nonCriticalInfractionCount"]
+            facility["inspections"] += 1
+        return len(new_reports)
+
+    def ingest_entries(
+        self, facility_id: str, report_id: str, entries: Iterable[Dict[str, Any]]
+    ) -> bool:
+        """Folds the entries of an inspection report into the rollups.
+
+        Args:
+            facility_id (str): The ID of the facility the report belongs to.
+            report_id (str): The ID of the inspection report.
+            entries (iterable): The entries of the inspection report.
+
+        Returns:
+            bool: True if the entries had not been ingested before, False otherwise.
+        """
+        ingested = self._ingested_ids(facility_id)["entries"]
+        if report_id in ingested:
+            return False
+
+        facility = self._facility(facility_id)
+        ingested.add(report_id)
+        for entry in entries:
+            code = self._result_code(entry["result"])
+            facility["results"][code] = facility["results"].get(code, 0) + 1
+            if code not in NON_COMPLIANT_RESULTS:
+                continue
+
+            description = entry["category"]["description"]
+            facility["categories"][description] = (
+                facility["categories"].get(description, 0) + 1
+            )
+            category = self.categories.setdefault(
+                description,
+                {code: 0 for code in NON_COMPLIANT_RESULTS} | {"critical": 0},
+            )
+            category[code] += 1
+            category["critical"] += int(entry["isCritical"])
+        return True
+
+    def critical_by_year(self, facility_id: str) -> Dict[str, int]:
+        """Returns the critical infraction count per year for a facility.
+
+        Args:
+            facility_id (str): The ID of the facility.
+
+        Returns:
+            dict: A mapping of years to critical infraction counts.
+        """
+        years = (self.facility(facility_id) or {}).get("years", {})
+        return {year: counts["critical"] for year, counts in sorted(years.items())}
+
+    def most_common_category(self, facility_id: str) -> Optional[str]:
+        """Returns the most frequent infraction category for a facility.
+
+        Args:
+            facility_id (str): The ID of the facility.
+
+        Returns:
+            str: The category description, or None if the facility has no infractions.
+        """
+        categories = (self.facility(facility_id) or {}).get("categories", {})
+        most_common = Counter(categories).most_common(1)
+        return most_common[0][0] if most_common else None
+
+    def result_counts(self, facility_id: str) -> Dict[str, int]:
+        """Returns the count of entries per result code for a facility.
+
+        Args:
+            facility_id (str): The ID of the facility.
+
+        Returns:
+            dict: A mapping of result codes (e.g. "NIC", "NM") to entry counts.
+        """
+        return dict((self.facility(facility_id) or {}).get("results", {}))
+
+    def save(self, directory: Path) -> None:
+        """Saves the rollups to a directory.
+
+        Only the facilities modified since the last save are written, as a new segment
+        of each index.
+
+        Args:
+            directory (Path): The directory to write the aggregates files to.
+
+        Returns:
+            None
+        """
+        directory = Path(directory)
+        if self._rollups is None:
+            self._rollups = SegmentedIndex(directory, AGGREGATES_INDEX_NAME)
+            self._ingested_index = SegmentedIndex(directory, INGESTED_INDEX_NAME)
+
+        self._rollups.append(
+            {
+                facility_id: _encode(self._facilities[facility_id])
+                for facility_id in self._modified
+            }
+        )
+        self._ingested_index.append(
+            {
+                facility_id: _encode(
+                    {kind: sorted(ids) for kind, ids in ingested.items()}
+                )
+                for facility_id, ingested in self._ingested.items()
+                if facility_id in self._modified
+            }
+        )
+        self._modified.clear()
+
+        state = {
+            "categories": self.categories,
+            "sources": {kind: sorted(names) for kind, names in self.sources.items()},
+        }
+        with open(directory / AGGREGATES_FILENAME, "w") as f:
+            json.dump(state, f, separators=(",", ":"))
+
+    @classmethod
+    def load(
+        cls, directory: Path, glossary: Optional[Dict[str, str]] = None
+    ) -> "FacilityAggregates":
+        """Loads the rollups from a directory.
+
+        Only the category rollups and source file names are read; facility rollups
+        and ingested IDs are read from the indexes as they are accessed.
+
+        Args:
+            directory (Path): The directory holding the aggregates files. If they do
+                not exist, empty rollups are returned.
+            glossary (dict): A mapping of result codes to descriptions. Defaults to None.
+
+        Returns:
+            FacilityAggregates: The loaded rollups.
+        """
+        directory = Path(directory)
+        aggregates = cls(glossary=glossary)
+        if (directory / AGGREGATES_FILENAME).exists():
+            with open(directory / AGGREGATES_FILENAME, "r") as f:
+                state = json.load(f)
+            aggregates.categories = state["categories"]
+            for kind, names in state["sources"].items():
+                aggregates.sources[kind] = set(names)
+        aggregates._rollups = SegmentedIndex(directory, AGGREGATES_INDEX_NAME)
+        aggregates._ingested_index = SegmentedIndex(directory, INGESTED_INDEX_NAME)
+        return aggregates
+
+    def close(self) -> None:
+        """Unmaps the facility indexes.
+
+        Returns:
+            None
+        """
+        for index in (self._rollups, self._ingested_index):
+            if index is not None:
+                index.close()
+        self._rollups = self._ingested_index = None
+
+
+def _encode(value: Any) -> bytes:
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def new_source_files(
+    sources: Set[str], directory_path: Path, pattern: str = "*.json"
+) -> List[Path]:
+    """Lists the source files in a directory that have not been ingested yet.
+
+    Args:
+        sources (set): The names of the files that have been ingested, such as
+            `FacilityAggregates.sources["details"]`.
+        directory_path (Path): The directory containing the source files.
+        pattern (str, optional): The file pattern to match. Defaults to "*.json".
+
+    Returns:
+        list: The paths of the files that have not been ingested, sorted by name.
+    """
+    return sorted(
+        file_path
+        for file_path in directory_path.glob(pattern)
+        if file_path.name not in sources
+    )
@@ -0,0 +1,300 @@
+import json
+import mmap
+import uuid
+import zlib
+import struct
+import logging
+import threading
+
+from pathlib import Path
+from typing import Union, Generator, Tuple, Any
+
+from vchtools.index import HashIndex, write_index
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MAGIC = b"VCHARC03"
+HEADER = struct.Struct("<8s8s")
+# Record key, endpoint and ID lengths, and compressed length, followed by the
+# UTF-8 endpoint and ID and the compressed response
+FRAME = struct.Struct("<16sHHI")
+LOCATION = struct.Struct("<QI")
+
+
+def record_key(endpoint: str, id: str) -> str:
+    """Returns the index key of a record.
+
+    Args:
+        endpoint (str): The endpoint the record was fetched from.
+        id (str): The ID the record was fetched for.
+
+    Returns:
+        str: A UUID derived from the endpoint and ID.
+    """
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{endpoint}#{id}"))
+
+
+def index_path(path: Path) -> Path:
+    """Returns the path of the sidecar index of an archive.
+
+    Args:
+        path (Path): The path of the archive.
+
+    Returns:
+        Path: The path of the sidecar index.
+    """
+    path = Path(path)
+    return path.with_suffix(path.suffix + ".idx")
+
+
+def _frames(
+    buffer: mmap.mmap, path: Path
+) -> Generator[Tuple[str, str, str, int, int], None, None]:
+    """Yields the frames of an archive in the order they were written.
+
+    A frame cut short at the end of the archive is left out.
+
+    Args:
+        buffer (mmap.mmap): The mapped archive.
+        path (Path): The path of the archive, for the log record.
+
+    Yields:
+        tuple: The record key, endpoint, ID, and the offset and length of the
+            compressed response.
+    """
+    offset, size = HEADER.size, len(buffer)
+    while offset + FRAME.size <= size:
+        key, endpoint_length, id_length, length = FRAME.unpack_from(buffer, offset)
+        names = offset + FRAME.size
+        body = names + endpoint_length + id_length
+        if body + length > size:
+            break
+        endpoint = buffer[names : names + endpoint_length].decode("utf-8")
+        id = buffer[names + endpoint_length : body].decode("utf-8")
+        yield str(uuid.UUID(bytes=key)), endpoint, id, body, length
+        offset = body + length
+
+    if offset != size:
+        logging.warning("Ignoring a truncated frame at the end of %s.", path)
+
+
+def _map(path: Path) -> mmap.mmap:
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, _ = HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        buffer.close()
+        raise ValueError(f"Not an archive file: {path}")
+    return buffer
+
+
+def rebuild_index(path: Path) -> int:
+    """Rebuilds the sidecar index of an archive from its frame headers.
+
+    Use this when an archive was not closed, for instance because the crawl writing
+    it was killed. A frame cut short at the end of the archive is left out.
+
+    Args:
+        path (Path): The path of the archive.
+
+    Returns:
+        int: The number of records in the rebuilt index.
+    """
+    buffer = _map(path)
+    try:
+        locations = {
+            key: LOCATION.pack(offset, length)
+            for key, _, _, offset, length in _frames(buffer, path)
+        }
+    finally:
+        buffer.close()
+    write_index(index_path(path), locations)
+    return len(locations)
+
+
+class ArchiveWriter(object):
+    """Writes raw API responses to an archive of individually compressed frames.
+
+    Every response is compressed on its own, with zstd when the `zstandard` package
+    is installed and zlib otherwise, and written as a frame headed by its key, its
+    endpoint and ID, and its length. The frame offsets are recorded in a sidecar hash index written when the
+    archive is closed, so records can be read back one at a time without
+    decompressing the rest of the archive. If the archive is not closed, the index
+    can be rebuilt from the frame headers with `rebuild_index`.
+
+    Args:
+        path (Path): The path of the archive to write.
+        level (int): The compression level. Defaults to 3.
+
+    Methods:
+        add(endpoint, id, response): Appends a raw response to the archive.
+        close(): Writes the sidecar index and closes the archive.
+    """
+
+    def __init__(self, path: Path, level: int = 3):
+        self.path = Path(path)
+        self.codec = b"zstd" if zstandard is not None else b"zlib"
+        if zstandard is not None:
+            self._compress = zstandard.ZstdCompressor(level=level).compress
+        else:
+            self._compress = lambda data: zlib.compress(data, level)
+
+        self._file = open(self.path, "wb")
+        self._file.write(HEADER.pack(MAGIC, self.codec))
+        self._locations = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def add(self, endpoint: str, id: str, response: Union[bytes, Any]) -> None:
+        """Appends a raw response to the archive.
+
+        Args:
+            endpoint (str): The endpoint the response was fetched from.
+            id (str): The ID the response was fetched for.
+            response (bytes): The raw response body. Other objects are JSON encoded.
+
+        Returns:
+            None
+        """
+        if not isinstance(response, bytes):
+            response = json.dumps(response).encode("utf-8")
+
+        key = record_key(endpoint, id)
+        endpoint_bytes, id_bytes = endpoint.encode("utf-8"), id.encode("utf-8")
+        with self._lock:
+            frame = self._compress(response)
+            self._file.write(
+                FRAME.pack(
+                    uuid.UUID(key).bytes, len(endpoint_bytes), len(id_bytes), len(frame)
+                )
+            )
+            self._file.write(endpoint_bytes + id_bytes)
+            self._locations[key] = LOCATION.pack(self._file.tell(), len(frame))
+            self._file.write(frame)
+
+    def close(self) -> None:
+        """Writes the sidecar index and closes the archive.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.close()
+            write_index(index_path(self.path), self._locations)
+
+
+class ArchiveReader(object):
+    """Reads single records from an archive written by `ArchiveWriter`.
+
+    If the sidecar index is missing, it is rebuilt from the archive first. Iterating
+    over the reader yields the `(endpoint, id)` pair of each record, so an archive
+    can be re-parsed without the ID lists it was fetched from.
+
+    Args:
+        path (Path): The path of the archive.
+
+    Methods:
+        get(endpoint, id): Returns the raw response of a record.
+        load(endpoint, id): Returns the decoded JSON response of a record.
+        items(): Yields the endpoint, ID and raw response of every record.
+        close(): Unmaps the archive and its index.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._mmap = _map(self.path)
+        _, codec = HEADER.unpack_from(self._mmap, 0)
+        self.codec = codec.rstrip(b"\0")
+        if self.codec == b"zstd":
+            if zstandard is None:
+                raise ImportError(
+                    "Reading zstd archives requires the zstandard package."
+                )
+            self._decompress = zstandard.ZstdDecompressor().decompress
+        else:
+            self._decompress = zlib.decompress
+
+        if not index_path(self.path).exists():
+            rebuild_index(self.path)
+        self._index = HashIndex(index_path(self.path))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, key):
+        endpoint, id = key
+        return record_key(endpoint, id) in self._index
+
+    def __iter__(self):
+        for _, endpoint, id, _, _ in _frames(self._mmap, self.path):
+            yield endpoint, id
+
+    def get(self, endpoint: str, id: str) -> bytes:
+        """Returns the raw response of a record.
+
+        Args:
+            endpoint (str): The endpoint the record was fetched from.
+            id (str): The ID the record was fetched for.
+
+        Returns:
+            bytes: The raw response body.
+
+        Raises:
+            KeyError: If the record is not in the archive.
+        """
+        location = self._index.get(record_key(endpoint, id))
+        if location is None:
+            raise KeyError((endpoint, id))
+        offset, length = LOCATION.unpack(location)
+        return self._decompress(self._mmap[offset : offset + length])
+
+    def load(self, endpoint: str, id: str) -> Any:
+        """Returns the decoded JSON response of a record.
+
+        Args:
+            endpoint (str): The endpoint the record was fetched from.
+            id (str): The ID the record was fetched for.
+
+        Returns:
+            Any: The decoded response.
+
+        Raises:
+            KeyError: If the record is not in the archive.
+        """
+        return json.loads(self.get(endpoint, id))
+
+    def items(self) -> Generator[Tuple[str, str, bytes], None, None]:
+        """Yields the endpoint, ID and raw response of every record.
+
+        The records are read in the order they were written, without the index.
+
+        Yields:
+            tuple: The endpoint, the ID and the raw response body.
+        """
+        for _, endpoint, id, offset, length in _frames(self._mmap, self.path):
+            yield endpoint, id, self._decompress(self._mmap[offset : offset + length])
+
+    def close(self) -> None:
+        """Unmaps the archive and its index.
+
+        Returns:
+            None
+        """
+        self._index.close()
+        self._mmap.close()
@@ -0,0 +1,537 @@
+import sys
+import json
+import argparse
+import importlib
+
+from os import environ
+from pathlib import Path
+from datetime import datetime
+from importlib import resources
+from typing import Optional, List
+
+# Command implementations are imported only once a subcommand is chosen, so that
+# `--help` and light commands such as `query` do not pay for `requests` and urllib3.
+COMMANDS = {
+    ("fetch", "facilities"): "vchtools.commands.fetch:fetch_facilities",
+    ("fetch", "facility-details"): "vchtools.commands.fetch:fetch_facility_details",
+    ("fetch", "inspection-details"): "vchtools.commands.fetch:fetch_inspection_details",
+    ("fetch", "inspection-reports"): "vchtools.commands.fetch:fetch_inspection_reports",
+    ("filter", "facilities"): "vchtools.commands.filter:filter_facilities",
+    (
+        "consolidate",
+        "facility-details",
+    ): "vchtools.commands.consolidate:consolidate_facility_details",
+    (
+        "consolidate",
+        "inspection-details",
+    ): "vchtools.commands.consolidate:consolidate_inspection_details",
+    (
+        "consolidate",
+        "inspection-reports",
+    ): "vchtools.commands.consolidate:consolidate_inspection_reports",
+    ("consolidate", "aggregates"): "vchtools.commands.consolidate:update_aggregates",
+    ("consolidate", "history"): "vchtools.commands.consolidate:update_history",
+    ("export", "index"): "vchtools.commands.export:export_index",
+    ("export", "aggregates"): "vchtools.commands.export:export_aggregates",
+    ("query", "facility"): "vchtools.commands.query:query_facility",
+    ("query", "community"): "vchtools.commands.query:query_community",
+    ("query", "aggregates"): "vchtools.commands.query:query_aggregates",
+    ("query", "history"): "vchtools.commands.query:query_history",
+}
+
+# The schemas and references are shipped as package data
+DEFAULT_SCHEMAS_DIR = resources.files("vchtools") / "schemas"
+DEFAULT_REFERENCES_DIR = resources.files("vchtools") / "references"
+
+
+def _add_env_option(
+    parser: argparse.ArgumentParser, flag: str, env: str, **kwargs
+) -> None:
+    """Adds an option that defaults to an environment variable.
+
+    The option is required only when the environment variable is not set.
+
+    Args:
+        parser (argparse.ArgumentParser): The parser to add the option to.
+        flag (str): The option flag, such as "--timeout".
+        env (str): The name of the environment variable providing the default.
+        **kwargs: Additional keyword arguments for `add_argument`.
+    """
+    default = environ.get(env)
+    parser.add_argument(
+        flag,
+        default=default,
+        required=default is None,
+        help=f"{kwargs.pop('help', '')} (env: {env})".strip(),
+        **kwargs,
+    )
+
+
+def _add_profile_options(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--profile",
+        type=Path,
+        default=None,
+        help="Write a per-stage time and memory report to this JSON file.",
+    )
+    parser.add_argument(
+        "--profile-stats",
+        type=Path,
+        default=None,
+        help="With --profile, also write cProfile statistics to this file.",
+    )
+
+
+def _add_projection_options(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--fields",
+        type=lambda fields: fields.split(","),
+        default=None,
+        help="Comma-separated dotted paths of the record fields to keep. Defaults to all.",
+    )
+    parser.add_argument(
+        "--schemas-dir",
+        type=Path,
+        default=DEFAULT_SCHEMAS_DIR,
+        help="Directory of JSON schemas the fields are validated against.",
+    )
+
+
+def _add_request_options(parser: argparse.ArgumentParser, url_env: str) -> None:
+    _add_env_option(parser, "--url", url_env, help="The endpoint URL.")
+    _add_env_option(
+        parser, "--headers", "HEADERS", type=json.loads, help="Request headers as JSON."
+    )
+    _add_env_option(
+        parser, "--timeout", "TIMEOUT", type=int, help="Request timeout in seconds."
+    )
+
+
+def _add_handler_options(parser: argparse.ArgumentParser, url_env: str) -> None:
+    _add_request_options(parser, url_env)
+    _add_profile_options(parser)
+    _add_env_option(
+        parser,
+        "--n-attempts",
+        "N_ATTEMPTS",
+        type=int,
+        help="Retry attempts per request.",
+    )
+    _add_env_option(
+        parser, "--throttle", "THROTTLE", type=float, help="Seconds between requests."
+    )
+    _add_env_option(
+        parser, "--n-workers", "N_WORKERS", type=int, help="Number of worker threads."
+    )
+    _add_env_option(
+        parser, "--log-dir", "LOGS_DIR", type=Path, help="Directory for log files."
+    )
+    parser.add_argument(
+        "--start", type=int, default=0, help="First index of the ID range."
+    )
+    parser.add_argument(
+        "--finish",
+        type=int,
+        default=None,
+        help="End index of the ID range (exclusive).",
+    )
+    parser.add_argument(
+        "--date",
+        default=datetime.now().strftime("%Y-%m-%d"),
+        help="Date of the input file.",
+    )
+
+
+def _add_retry_options(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help="Only retry the IDs of the range in the dead-letter store.",
+    )
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=5,
+        help="Retries of a failed ID per run.",
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Builds the argument parser of the `vchtools` command.
+
+    Returns:
+        argparse.ArgumentParser: The parser.
+    """
+    parser = argparse.ArgumentParser(
+        prog="vchtools",
+        description="Fetch, process and query Vancouver Coastal Health inspection reports.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    # Fetch
+    fetch = commands.add_parser("fetch", help="Fetch data from the inspections API.")
+    fetch_targets = fetch.add_subparsers(dest="target", required=True)
+
+    target = fetch_targets.add_parser("facilities", help="Fetch the facility listing.")
+    _add_request_options(target, "FACILITIES_ENDPOINT")
+    _add_profile_options(target)
+    _add_env_option(
+        target,
+        "--output-dir",
+        "RAW_FACILITIES_DIR",
+        type=Path,
+        help="Output directory.",
+    )
+    target.add_argument(
+        "--page-size", type=int, default=10_689, help="Number of facilities to request."
+    )
+    target.add_argument(
+        "--schemas-dir",
+        type=Path,
+        default=DEFAULT_SCHEMAS_DIR,
+        help="Directory of JSON schemas.",
+    )
+
+    target = fetch_targets.add_parser(
+        "facility-details", help="Fetch details of filtered facilities."
+    )
+    _add_projection_options(target)
+    _add_handler_options(target, "FACILITY_DETAILS_ENDPOINT")
+    _add_env_option(
+        target,
+        "--facilities-dir",
+        "RAW_FACILITIES_DIR",
+        type=Path,
+        help="Facilities directory.",
+    )
+    target.add_argument(
+        "--filter",
+        default="vancouver-FSE1",
+        help="Name of the filtered facilities file.",
+    )
+
+    target = fetch_targets.add_parser(
+        "inspection-details", help="Fetch inspection lists of facilities."
+    )
+    _add_projection_options(target)
+    _add_handler_options(target, "INSPECTION_DETAILS_ENDPOINT")
+    _add_retry_options(target)
+    _add_env_option(
+        target,
+        "--facilities-dir",
+        "RAW_FACILITIES_DIR",
+        type=Path,
+        help="Facilities directory.",
+    )
+    _add_env_option(
+        target,
+        "--output-dir",
+        "RAW_REPORT_DETAILS_DIR",
+        type=Path,
+        help="Output directory.",
+    )
+    target.add_argument(
+        "--filter",
+        default="vancouver-FSE1",
+        help="Name of the filtered facilities file.",
+    )
+
+    target = fetch_targets.add_parser(
+        "inspection-reports", help="Fetch inspection report entries."
+    )
+    _add_projection_options(target)
+    _add_handler_options(target, "INSPECTION_REPORT_ENDPOINT")
+    _add_retry_options(target)
+    _add_env_option(
+        target,
+        "--reports-dir",
+        "PROCESSED_REPORTS_DIR",
+        type=Path,
+        help="Consolidated reports directory.",
+    )
+    _add_env_option(
+        target,
+        "--output-dir",
+        "RAW_REPORT_INSPECTIONS_DIR",
+        type=Path,
+        help="Output directory.",
+    )
+    target.add_argument(
+        "--archive-dir",
+        type=Path,
+        default=environ.get("ARCHIVE_DIR"),
+        help="Directory for the raw response archive. (env: ARCHIVE_DIR)",
+    )
+    target.add_argument(
+        "--min-entries",
+        type=int,
+        default=5,
+        help="Minimum routine inspections per facility.",
+    )
+
+    # Filter
+    filter_ = commands.add_parser("filter", help="Filter fetched data.")
+    filter_targets = filter_.add_subparsers(dest="target", required=True)
+
+    target = filter_targets.add_parser(
+        "facilities", help="Keep Food Service Establishment 1 facilities in Vancouver."
+    )
+    _add_env_option(
+        target,
+        "--input-dir",
+        "RAW_FACILTIES_DIR",
+        type=Path,
+        help="Raw facilities directory.",
+    )
+    _add_env_option(
+        target, "--output-dir", "TMP_FACILTIES_DIR", type=Path, help="Output directory."
+    )
+    target.add_argument(
+        "--date",
+        default=datetime.now().strftime("%Y-%m-%d"),
+        help="Date of the facility listing.",
+    )
+    target.add_argument(
+        "--schemas-dir",
+        type=Path,
+        default=DEFAULT_SCHEMAS_DIR,
+        help="Directory of JSON schemas.",
+    )
+
+    # Consolidate
+    consolidate = commands.add_parser(
+        "consolidate", help="Consolidate raw crawl outputs."
+    )
+    consolidate_targets = consolidate.add_subparsers(dest="target", required=True)
+
+    target = consolidate_targets.add_parser(
+        "facility-details", help="Consolidate facility details."
+    )
+    _add_projection_options(target)
+    _add_profile_options(target)
+    _add_env_option(
+        target,
+        "--input-dir",
+        "RAW_FACILITIES_DIR",
+        type=Path,
+        help="Raw facilities directory.",
+    )
+    _add_env_option(
+        target,
+        "--output-dir",
+        "PROCESSED_FACILITIES_DIR",
+        type=Path,
+        help="Output directory.",
+    )
+
+    target = consolidate_targets.add_parser(
+        "inspection-details", help="Consolidate inspection lists."
+    )
+    _add_projection_options(target)
+    _add_profile_options(target)
+    _add_env_option(
+        target,
+        "--input-dir",
+        "RAW_REPORT_DETAILS_DIR",
+        type=Path,
+        help="Raw inspection details directory.",
+    )
+    _add_env_option(
+        target,
+        "--output-dir",
+        "PROCESSED_REPORTS_DIR",
+        type=Path,
+        help="Output directory.",
+    )
+
+    target = consolidate_targets.add_parser(
+        "inspection-reports", help="Consolidate inspection reports."
+    )
+    _add_projection_options(target)
+    _add_profile_options(target)
+    _add_env_option(
+        target,
+        "--input-dir",
+        "RAW_REPORT_INSPECTIONS_DIR",
+        type=Path,
+        help="Raw inspection reports directory.",
+    )
+    _add_env_option(
+        target,
+        "--output-dir",
+        "PROCESSED_REPORTS_DIR",
+        type=Path,
+        help="Output directory.",
+    )
+
+    target = consolidate_targets.add_parser(
+        "aggregates", help="Fold newly crawled data into the aggregates."
+    )
+    _add_profile_options(target)
+    _add_env_option(
+        target,
+        "--details-dir",
+        "RAW_REPORT_DETAILS_DIR",
+        type=Path,
+        help="Raw inspection details directory.",
+    )
+    _add_env_option(
+        target,
+        "--reports-dir",
+        "RAW_REPORT_INSPECTIONS_DIR",
+        type=Path,
+        help="Raw inspection reports directory.",
+    )
+    _add_env_option(
+        target,
+        "--output-dir",
+        "PROCESSED_REPORTS_DIR",
+        type=Path,
+        help="Directory of the aggregates file.",
+    )
+    target.add_argument(
+        "--references-dir",
+        type=Path,
+        default=DEFAULT_REFERENCES_DIR,
+        help="Directory of reference files.",
+    )
+
+    target = consolidate_targets.add_parser(
+        "history", help="Fold newly crawled inspections into the history index."
+    )
+    _add_profile_options(target)
+    _add_env_option(
+        target,
+        "--details-dir",
+        "RAW_REPORT_DETAILS_DIR",
+        type=Path,
+        help="Raw inspection details directory.",
+    )
+    _add_env_option(
+        target,
+        "--output-dir",
+        "PROCESSED_REPORTS_DIR",
+        type=Path,
+        help="Directory of the history index.",
+    )
+
+    # Export
+    export = commands.add_parser("export", help="Export derived data.")
+    export_targets = export.add_subparsers(dest="target", required=True)
+
+    target = export_targets.add_parser(
+        "index", help="Build the join index from consolidated data."
+    )
+    _add_env_option(
+        target,
+        "--facilities-dir",
+        "PROCESSED_FACILITIES_DIR",
+        type=Path,
+        help="Consolidated facilities directory.",
+    )
+    _add_env_option(
+        target,
+        "--reports-dir",
+        "PROCESSED_REPORTS_DIR",
+        type=Path,
+        help="Consolidated reports directory.",
+    )
+    _add_env_option(
+        target, "--index-dir", "INDEX_DIR", type=Path, help="Index directory."
+    )
+    target.add_argument("--date", required=True, help="Date of the consolidated files.")
+
+    target = export_targets.add_parser(
+        "aggregates", help="Export per-facility yearly aggregates as CSV."
+    )
+    _add_env_option(
+        target,
+        "--reports-dir",
+        "PROCESSED_REPORTS_DIR",
+        type=Path,
+        help="Directory of the aggregates file.",
+    )
+    target.add_argument(
+        "--output", type=Path, default=None, help="Output CSV file. Defaults to stdout."
+    )
+
+    # Query
+    query = commands.add_parser("query", help="Query the index and aggregates.")
+    query_targets = query.add_subparsers(dest="target", required=True)
+
+    target = query_targets.add_parser(
+        "facility", help="Show a facility and its inspections."
+    )
+    _add_env_option(
+        target, "--index-dir", "INDEX_DIR", type=Path, help="Index directory."
+    )
+    target.add_argument("facility_id", help="The facility ID.")
+
+    target = query_targets.add_parser(
+        "community", help="List the entries of facilities in a community."
+    )
+    _add_env_option(
+        target, "--index-dir", "INDEX_DIR", type=Path, help="Index directory."
+    )
+    target.add_argument("community", help="The community name.")
+
+    target = query_targets.add_parser(
+        "aggregates", help="Show the aggregates of a facility."
+    )
+    _add_env_option(
+        target,
+        "--reports-dir",
+        "PROCESSED_REPORTS_DIR",
+        type=Path,
+        help="Directory of the aggregates file.",
+    )
+    target.add_argument("facility_id", help="The facility ID.")
+
+    target = query_targets.add_parser(
+        "history", help="Show the inspections of a facility over time."
+    )
+    _add_env_option(
+        target,
+        "--reports-dir",
+        "PROCESSED_REPORTS_DIR",
+        type=Path,
+        help="Directory of the history index.",
+    )
+    target.add_argument("facility_id", help="The facility ID.")
+    target.add_argument("--start", default="1970-01-01", help="Start date (inclusive).")
+    target.add_argument("--end", default="9999-12-31", help="End date (inclusive).")
+    target.add_argument(
+        "--as-of", default=None, help="Also show the hazard rating on this date."
+    )
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Runs the `vchtools` command.
+
+    Args:
+        argv (list): The command line arguments. Defaults to None, which uses sys.argv.
+
+    Returns:
+        None
+    """
+    from vchtools.profiler import Profiler
+
+    args = build_parser().parse_args(argv)
+    profile = getattr(args, "profile", None)
+    args.profiler = Profiler(
+        enabled=profile is not None, stats_path=getattr(args, "profile_stats", None)
+    )
+
+    module_name, function_name = COMMANDS[(args.command, args.target)].split(":")
+    command = getattr(importlib.import_module(module_name), function_name)
+    # The report is also written when the command fails or is interrupted
+    try:
+        command(args)
+    finally:
+        args.profiler.write_report(profile)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,30 @@
+import argparse
+
+# The facility fields kept from the listing
+FACILITY_FIELDS = (
+    "id",
+    "facilityType",
+    "facilityName",
+    "community",
+    "siteAddress",
+    "latitude",
+    "longitude",
+)
+
+
+def load_projection(args: argparse.Namespace, schema_name: str):
+    """Builds the projection requested with `--fields`, if any.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments.
+        schema_name (str): The file name of the schema the fields are validated against.
+
+    Returns:
+        Projection: The projection, or None if no fields were requested.
+    """
+    if args.fields is None:
+        return None
+
+    from vchtools.projection import Projection
+
+    return Projection.from_schema(args.schemas_dir / schema_name, args.fields)
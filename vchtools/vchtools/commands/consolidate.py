@@ -0,0 +1,135 @@
+import json
+import argparse
+
+from vchtools.commands import load_projection
+
+
+def consolidate_facility_details(args: argparse.Namespace) -> None:
+    """Consolidates the fetched facility details into a single file.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments.
+    """
+    from vchtools import consolidator
+
+    with args.profiler.stage("load") as stage:
+        facility_details = consolidator.load_data_from_json(
+            args.input_dir / "vancouver_FSE1_details",
+            projection=load_projection(args, "facility.json"),
+        )
+        stage.records = len(facility_details)
+    with args.profiler.stage("save") as stage:
+        consolidator.save_data_to_json(
+            facility_details, args.output_dir, "vancouver_FSE1_details"
+        )
+        stage.records = len(facility_details)
+
+
+def consolidate_inspection_details(args: argparse.Namespace) -> None:
+    """Consolidates the fetched inspection lists into a single file.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments.
+    """
+    from vchtools import consolidator
+
+    with args.profiler.stage("load") as stage:
+        inspection_report_details = consolidator.load_data_from_json(
+            args.input_dir, projection=load_projection(args, "report.json")
+        )
+        stage.records = len(inspection_report_details)
+    with args.profiler.stage("save") as stage:
+        consolidator.save_data_to_json(
+            inspection_report_details, args.output_dir, "inspection-details"
+        )
+        stage.records = len(inspection_report_details)
+
+
+def consolidate_inspection_reports(args: argparse.Namespace) -> None:
+    """Consolidates the fetched inspection reports into a single file.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments.
+    """
+    from vchtools import consolidator
+
+    with args.profiler.stage("load") as stage:
+        inspection_reports = consolidator.load_data_from_json(
+            args.input_dir, projection=load_projection(args, "entry.json")
+        )
+        stage.records = len(inspection_reports)
+    with args.profiler.stage("save") as stage:
+        consolidator.save_data_to_json(
+            inspection_reports, args.output_dir, "inspection-reports"
+        )
+        stage.records = len(inspection_reports)
+
+
+def update_aggregates(args: argparse.Namespace) -> None:
+    """Folds the raw files that were not ingested yet into the aggregates.
+
+    Only new raw files are read and only the facilities they touch are written, so
+    the cost of a refresh is proportional to the newly crawled data.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments.
+    """
+    from vchtools import aggregates
+
+    with aggregates.FacilityAggregates.load(
+        args.output_dir,
+        glossary=aggregates.load_glossary(args.references_dir / "glossary.json"),
+    ) as facility_aggregates:
+        with args.profiler.stage("ingest-reports") as stage:
+            for file_path in aggregates.new_source_files(
+                facility_aggregates.sources["details"], args.details_dir
+            ):
+                with open(file_path, "r") as f:
+                    for facility in json.load(f):
+                        for facility_id, reports in facility.items():
+                            stage.records += facility_aggregates.ingest_reports(
+                                facility_id, reports
+                            )
+                facility_aggregates.sources["details"].add(file_path.name)
+
+        with args.profiler.stage("ingest-entries") as stage:
+            for file_path in aggregates.new_source_files(
+                facility_aggregates.sources["reports"], args.reports_dir
+            ):
+                with open(file_path, "r") as f:
+                    for facility in json.load(f):
+                        for facility_id, reports in facility.items():
+                            for report_id, entries in reports:
+                                stage.records += facility_aggregates.ingest_entries(
+                                    facility_id, report_id, entries
+                                )
+                facility_aggregates.sources["reports"].add(file_path.name)
+
+        with args.profiler.stage("save"):
+            facility_aggregates.save(args.output_dir)
+
+
+def update_history(args: argparse.Namespace) -> None:
+    """Folds the inspection lists that were not ingested yet into the history index.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments.
+    """
+    from vchtools import aggregates, history
+
+    history_path = args.output_dir / history.HISTORY_FILENAME
+    with args.profiler.stage("load"):
+        history_index = history.HistoryIndex.load(history_path)
+
+    with args.profiler.stage("ingest-reports") as stage:
+        for file_path in aggregates.new_source_files(
+            history_index.sources, args.details_dir
+        ):
+            with open(file_path, "r") as f:
+                for facility in json.load(f):
+                    for facility_id, reports in facility.items():
+                        stage.records += history_index.ingest(facility_id, reports)
+            history_index.sources.add(file_path.name)
+
+    with args.profiler.stage("save"):
+        history_index.save(history_path)
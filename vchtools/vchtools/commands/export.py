@@ -0,0 +1,61 @@
+import sys
+import csv
+import json
+import argparse
+
+
+def export_index(args: argparse.Namespace) -> None:
+    """Builds the join index from the consolidated files of a date.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments.
+    """
+    from vchtools import index
+
+    with open(
+        args.facilities_dir / f"{args.date}_vancouver_FSE1_details.json", "r"
+    ) as f:
+        facilities = json.load(f)
+
+    with open(args.reports_dir / f"{args.date}_inspection-details.json", "r") as f:
+        inspection_details = json.load(f)
+
+    with open(args.reports_dir / f"{args.date}_inspection-reports.json", "r") as f:
+        inspection_reports = json.load(f)
+
+    args.index_dir.mkdir(parents=True, exist_ok=True)
+    index.JoinIndex.build(
+        args.index_dir, facilities, inspection_details, inspection_reports
+    )
+
+
+def export_aggregates(args: argparse.Namespace) -> None:
+    """Writes the per-facility yearly aggregates as CSV.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments.
+    """
+    from vchtools import aggregates
+
+    with aggregates.FacilityAggregates.load(args.reports_dir) as facility_aggregates:
+        f = open(args.output, "w", newline="") if args.output else sys.stdout
+        try:
+            writer = csv.writer(f)
+            writer.writerow(
+                ["facility_id", "year", "inspections", "critical", "non_critical"]
+            )
+            for facility_id in facility_aggregates.facility_ids():
+                facility = facility_aggregates.facility(facility_id)
+                for year, counts in sorted(facility["years"].items()):
+                    writer.writerow(
+                        [
+                            facility_id,
+                            year,
+                            counts["inspections"],
+                            counts["critical"],
+                            counts["nonCritical"],
+                        ]
+                    )
+        finally:
+            if f is not sys.stdout:
+                f.close()
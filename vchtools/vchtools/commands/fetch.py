@@ -0,0 +1,281 @@
+import json
+import logging
+import argparse
+
+from pathlib import Path
+from datetime import datetime
+from typing import List, Dict, Any
+
+from vchtools.commands import FACILITY_FIELDS, load_projection
+
+
+def _setup_logging(args: argparse.Namespace, name: str) -> None:
+    from vchtools import logger
+
+    logger.setup_logging(
+        log_file=args.log_dir
+        / f"{name}_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.log",
+        structured=True,
+        queued=True,
+        sample_every=10,
+    )
+
+
+def _load_facility_ids(path: Path) -> List[str]:
+    with path.open(mode="r") as f:
+        return [facility["id"] for facility in json.load(f)]
+
+
+def _retry_dead_letters(
+    args: argparse.Namespace, handler, dead_letters, ids: List[str]
+) -> List[Dict[str, Any]]:
+    from vchtools import fetcher
+
+    with args.profiler.stage("retry") as stage:
+        scheduler = fetcher.RetryScheduler(
+            handler, dead_letters, max_attempts=args.max_attempts
+        )
+        recovered = list(scheduler.run(ids))
+        stage.records = len(recovered)
+    return recovered
+
+
+def _range_suffix(args: argparse.Namespace, n_ids: int) -> str:
+    finish = n_ids if args.finish is None else min(args.finish, n_ids)
+    return f"range-{args.start}-{finish - 1}"
+
+
+def fetch_facilities(args: argparse.Namespace) -> None:
+    """Fetches the facility listing, keeping only the fields used downstream.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments.
+    """
+    import requests
+    from vchtools.projection import Projection
+
+    projection = Projection.from_schema(
+        args.schemas_dir / "facility.json", FACILITY_FIELDS
+    )
+
+    payload = json.dumps(
+        {
+            "pageNumber": 0,
+            "pageSize": args.page_size,
+            "criteria": "",
+            "sort": [{"field": "community", "order": "asc"}],
+            "disclosureProgramId": "9b234c07-fdcb-4d9f-a1d6-d5a0d6a77cd8",
+            "fields": projection.top_level_fields(),
+            "filters": [],
+        }
+    )
+
+    with args.profiler.stage("fetch"), requests.request(
+        "POST", args.url, headers=args.headers, data=payload, timeout=args.timeout
+    ) as response:
+        response.raise_for_status()
+        with args.profiler.stage("decode") as stage:
+            facilities = projection.loads(response.content)
+            stage.records = len(facilities.get("result", []))
+
+    date = datetime.now().strftime("%Y-%m-%d")
+    with args.profiler.stage("save"), open(
+        args.output_dir / f"{date}_facilities.json", "w"
+    ) as f:
+        json.dump(facilities, f, indent=2)
+
+
+def fetch_facility_details(args: argparse.Namespace) -> None:
+    """Fetches the details of the filtered facilities.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments.
+    """
+    from vchtools import fetcher
+
+    _setup_logging(args, "facility_details")
+    timestamp = datetime.now().strftime("%Y-%m-%d+%H-%M-%S")
+    facility_ids = _load_facility_ids(
+        args.facilities_dir / f"{args.date}_{args.filter}.json"
+    )
+
+    with fetcher.ThreadedPOSTRequestHandler(
+        url=args.url,
+        headers=args.headers,
+        n_attempts=args.n_attempts,
+        timeout=args.timeout,
+        throttle=args.throttle,
+    ) as handler, args.profiler.stage("fetch") as stage:
+        handler.set_custom_payload(lambda id: json.dumps([id]))
+        handler.set_projection(load_projection(args, "facility.json"))
+        handler.set_profiler(args.profiler)
+        facility_details = list(
+            handler.fetch_ranged_threaded(
+                facility_ids, args.start, args.finish, args.n_workers
+            )
+        )
+        stage.records = len(facility_details)
+
+    output_dir = args.facilities_dir / "vancouver_FSE1_details"
+    filename = f"{timestamp}_{_range_suffix(args, len(facility_ids))}_{args.date}_{args.filter}.json"
+    with args.profiler.stage("save"), open(output_dir / filename, mode="w") as f:
+        json.dump(facility_details, f, indent=2)
+
+
+def fetch_inspection_details(args: argparse.Namespace) -> None:
+    """Fetches the inspection lists of the filtered facilities.
+
+    IDs of the range that failed, in this or a previous run, are retried from the
+    dead-letter store. With `--retry-failed`, only those IDs are requested. The output
+    holds one `{facility_id: inspections}` record per facility.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments.
+    """
+    from vchtools import fetcher
+
+    _setup_logging(args, "inspection_details")
+    timestamp = datetime.now().strftime("%Y-%m-%d+%H-%M-%S")
+    facility_ids = _load_facility_ids(
+        args.facilities_dir / f"{args.date}_{args.filter}.json"
+    )
+
+    dead_letters = fetcher.DeadLetterStore(
+        args.log_dir / "inspection_details_dead_letters.jsonl"
+    )
+    with fetcher.ThreadedGETRequestHandler(
+        url=args.url,
+        headers=args.headers,
+        n_attempts=args.n_attempts,
+        timeout=args.timeout,
+        throttle=args.throttle,
+    ) as handler:
+        handler.set_dead_letter_store(dead_letters)
+        handler.set_projection(load_projection(args, "report.json"))
+        handler.set_profiler(args.profiler)
+        report_entries = []
+        if not args.retry_failed:
+            with args.profiler.stage("fetch") as stage:
+                report_entries = list(
+                    handler.fetch_ranged_threaded(
+                        ids=facility_ids,
+                        start=args.start,
+                        finish=args.finish,
+                        n_workers=args.n_workers,
+                        keyed=True,
+                    )
+                )
+                stage.records = len(report_entries)
+
+        report_entries += _retry_dead_letters(
+            args, handler, dead_letters, facility_ids[args.start : args.finish]
+        )
+    dead_letters.compact()
+
+    filename = f"{timestamp}_{args.filter}_{_range_suffix(args, len(facility_ids))}_inspection_details.json"
+    with args.profiler.stage("save"), open(args.output_dir / filename, mode="w") as f:
+        json.dump(report_entries, f, indent=2)
+
+
+def fetch_inspection_reports(args: argparse.Namespace) -> None:
+    """Fetches the report entries of facilities with enough routine inspections.
+
+    Report IDs of the range that failed, in this or a previous run, are retried from
+    the dead-letter store. With `--retry-failed`, only those IDs are requested.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments.
+    """
+    from contextlib import nullcontext
+    from vchtools import archive, fetcher
+
+    _setup_logging(args, "inspection_reports")
+    timestamp = datetime.now().strftime("%Y-%m-%d+%H-%M-%S")
+
+    with args.profiler.stage("load"), open(
+        args.reports_dir / f"{args.date}_inspection-details.json", "r"
+    ) as f:
+        inspection_details = json.load(f)
+
+    # Same order and first-wins lookup as ChainMap(*inspection_details), which scans
+    # every map on each lookup, so --start/--finish select the same facilities
+    facility_reports_index = {}
+    for facility in reversed(inspection_details):
+        facility_reports_index.update(facility)
+
+    inspection_report_ids = []
+    for facility_id, entries in facility_reports_index.items():
+        entry_ids = [
+            entry["id"] for entry in entries if entry["inspectionType"] == "Routine"
+        ]
+        if len(entry_ids) < args.min_entries:
+            continue
+        inspection_report_ids.append([facility_id, entry_ids])
+
+    suffix = _range_suffix(args, len(inspection_report_ids))
+    ranged_report_ids = inspection_report_ids[args.start : args.finish]
+    dead_letters = fetcher.DeadLetterStore(
+        args.log_dir / "inspection_reports_dead_letters.jsonl"
+    )
+    raw_archive = (
+        archive.ArchiveWriter(
+            args.archive_dir / f"{timestamp}_{suffix}_inspection_reports.arc"
+        )
+        if args.archive_dir is not None
+        else nullcontext()
+    )
+    with raw_archive, fetcher.ThreadedGETRequestHandler(
+        url=args.url,
+        headers=args.headers,
+        n_attempts=args.n_attempts,
+        timeout=args.timeout,
+        throttle=args.throttle,
+    ) as handler:
+        if args.archive_dir is not None:
+            handler.set_archive(raw_archive)
+        handler.set_dead_letter_store(dead_letters)
+        handler.set_projection(load_projection(args, "entry.json"))
+        handler.set_profiler(args.profiler)
+
+        facility_reports: Dict[str, list] = {}
+        if not args.retry_failed:
+            logging.info(
+                "Fetching records in range: [%d, %s).", args.start, args.finish
+            )
+            with args.profiler.stage("fetch") as stage:
+                for facility_id, entry_ids in ranged_report_ids:
+                    reports = [
+                        (report_id, data)
+                        for report in handler.fetch_all_threaded(
+                            entry_ids, args.n_workers, keyed=True
+                        )
+                        for report_id, data in report.items()
+                    ]
+                    facility_reports[facility_id] = reports
+                    stage.records += len(reports)
+
+        report_facilities = {
+            report_id: facility_id
+            for facility_id, entry_ids in ranged_report_ids
+            for report_id in entry_ids
+        }
+        for recovered in _retry_dead_letters(
+            args, handler, dead_letters, list(report_facilities)
+        ):
+            for report_id, data in recovered.items():
+                facility_reports.setdefault(report_facilities[report_id], []).append(
+                    (report_id, data)
+                )
+    dead_letters.compact()
+
+    with args.profiler.stage("save"), open(
+        args.output_dir / f"{timestamp}_{suffix}_inspection_reports.json", mode="w"
+    ) as f:
+        json.dump(
+            [
+                {facility_id: reports}
+                for facility_id, reports in facility_reports.items()
+            ],
+            f,
+            indent=2,
+        )
@@ -0,0 +1,31 @@
+import re
+import json
+import argparse
+
+from vchtools.commands import FACILITY_FIELDS
+
+
+def filter_facilities(args: argparse.Namespace) -> None:
+    """Keeps the Food Service Establishment 1 facilities in Vancouver.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments.
+    """
+    from vchtools.projection import Projection
+
+    projection = Projection.from_schema(
+        args.schemas_dir / "facility.json", FACILITY_FIELDS
+    )
+    with open(args.input_dir / f"{args.date}_facilities.json", "r") as f:
+        facilities = projection.load(f)
+
+    vancouver_facilities = []
+    for facility in facilities["result"]:
+        is_FSE1 = facility["facilityType"] == "Food Service Establishment 1"
+        is_vancouver = re.match("Vancouver", facility["community"])
+
+        if is_FSE1 and is_vancouver:
+            vancouver_facilities.append({key: facility[key] for key in FACILITY_FIELDS})
+
+    with open(args.output_dir / f"{args.date}_vancouver-FSE1.json", "w") as f:
+        json.dump(vancouver_facilities, f, indent=2)
@@ -0,0 +1,73 @@
+import json
+import argparse
+
+
+def query_facility(args: argparse.Namespace) -> None:
+    """Prints a facility and its inspection report IDs as JSON.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments.
+    """
+    from vchtools.index import JoinIndex
+
+    with JoinIndex(args.index_dir) as join_index:
+        facility = join_index.facility(args.facility_id)
+        inspections = join_index.inspections(args.facility_id)
+    print(json.dumps({"facility": facility, "inspections": inspections}, indent=2))
+
+
+def query_community(args: argparse.Namespace) -> None:
+    """Prints the entries of all facilities in a community as JSON lines.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments.
+    """
+    from vchtools.index import JoinIndex
+
+    with JoinIndex(args.index_dir) as join_index:
+        for facility_id, report_id, entry in join_index.entries_in(args.community):
+            print(
+                json.dumps(
+                    {"facilityId": facility_id, "reportId": report_id, "entry": entry}
+                )
+            )
+
+
+def query_aggregates(args: argparse.Namespace) -> None:
+    """Prints the aggregates of a facility as JSON.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments.
+    """
+    from vchtools import aggregates
+
+    with aggregates.FacilityAggregates.load(args.reports_dir) as facility_aggregates:
+        summary = {
+            "criticalByYear": facility_aggregates.critical_by_year(args.facility_id),
+            "mostCommonCategory": facility_aggregates.most_common_category(
+                args.facility_id
+            ),
+            "resultCounts": facility_aggregates.result_counts(args.facility_id),
+        }
+    print(json.dumps(summary, indent=2))
+
+
+def query_history(args: argparse.Namespace) -> None:
+    """Prints the inspections of a facility between two dates as JSON.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments.
+    """
+    from vchtools import history
+
+    history_index = history.HistoryIndex.load(
+        args.reports_dir / history.HISTORY_FILENAME
+    )
+    summary = {
+        "inspections": history_index.between(args.facility_id, args.start, args.end)
+    }
+    if args.as_of is not None:
+        summary["hazardRatingAsOf"] = history_index.hazard_rating(
+            args.facility_id, args.as_of
+        )
+    print(json.dumps(summary, indent=2))
@@ -1,25 +1,30 @@
 import json
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Optional, List, Dict, Any
 from datetime import datetime
+from vchtools.projection import Projection
 
 
 def load_data_from_json(
-    directory_path: Path, pattern: str = "*.json"
+    directory_path: Path,
+    pattern: str = "*.json",
+    projection: Optional[Projection] = None,
 ) -> List[Dict[str, Any]]:
     """Loads data from JSON files in a given directory.
 
     Args:
         directory_path (Path): The path to the directory containing the JSON files.
         pattern (str, optional): The file pattern to match. Defaults to "*.json".
+        projection (Projection, optional): The fields to keep from each record, applied
+            as each file is loaded. Defaults to None, which keeps every field.
 
     Returns:
         List[Dict[str, Any]]: A list of dictionaries containing the loaded data from the JSON files.
     """
     data: List[Dict[str, Any]] = []
     for file_path in directory_path.glob(pattern):
-        with open(file_path, "r") as f:
-            data.extend(json.load(f))
+        with open(file_path, "rb") as f:
+            data.extend(json.load(f) if projection is None else projection.load(f))
     return data
 
 
@@ -1,10 +1,22 @@
-from vchtools.fetcher.threaded import (
-    ThreadedRequestHandlerMixin,
-    ThreadedGETRequestHandler,
-    ThreadedPOSTRequestHandler,
-)
-from vchtools.fetcher.synchronous import (
-    APIHandler,
-    GETRequestHandler,
-    POSTRequestHandler,
-)
+import importlib
+
+# The handlers are resolved on first access, so the dead-letter store can be used
+# without importing `requests` and urllib3.
+_LAZY_ATTRIBUTES = {
+    "ThreadedRequestHandlerMixin": "vchtools.fetcher.threaded",
+    "ThreadedGETRequestHandler": "vchtools.fetcher.threaded",
+    "ThreadedPOSTRequestHandler": "vchtools.fetcher.threaded",
+    "APIHandler": "vchtools.fetcher.synchronous",
+    "GETRequestHandler": "vchtools.fetcher.synchronous",
+    "POSTRequestHandler": "vchtools.fetcher.synchronous",
+    "DeadLetterStore": "vchtools.fetcher.deadletter",
+    "RetryScheduler": "vchtools.fetcher.deadletter",
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        return getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,322 @@
+import json
+import random
+import logging
+import threading
+
+from time import time, sleep
+from pathlib import Path
+from typing import Iterable, Optional, Callable, Generator, List, Dict, Set, Any
+
+
+class DeadLetterStore(object):
+    """A persistent record of IDs whose requests failed.
+
+    Failures and resolutions are appended to a JSON lines file as they happen, so the
+    store survives crashes without rewriting the whole file on every change. The file
+    is replayed when the store is opened.
+
+    Args:
+        path (Path): The path to the JSON lines file backing the store.
+
+    Attributes:
+        path (Path): The path to the JSON lines file backing the store.
+        failures (dict): The unresolved failures, keyed by ID.
+
+    Methods:
+        record(id, endpoint, err, status): Records a failed request for an ID.
+        defer(id, next_attempt): Postpones the next retry of an ID.
+        resolve(id): Removes an ID from the store after a successful request.
+        pending(endpoint, ids): Returns the unresolved failures.
+        due(now, endpoint, ids): Returns the IDs whose backoff has elapsed.
+        compact(): Rewrites the file with only the unresolved failures.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.failures: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+        if self.path.exists():
+            with self.path.open(mode="r") as f:
+                for line in f:
+                    event = json.loads(line)
+                    kind = event.pop("event")
+                    if kind == "failed":
+                        self.failures[event["id"]] = event
+                    elif kind == "deferred" and event["id"] in self.failures:
+                        self.failures[event["id"]]["nextAttempt"] = event["nextAttempt"]
+                    elif kind == "resolved":
+                        self.failures.pop(event["id"], None)
+
+    def __len__(self):
+        return len(self.failures)
+
+    def __contains__(self, id):
+        return id in self.failures
+
+    def _append(self, event: Dict[str, Any]) -> None:
+        with self.path.open(mode="a") as f:
+            f.write(json.dumps(event) + "\n")
+
+    def record(
+        self,
+        id: str,
+        endpoint: str,
+        err: Exception,
+        status: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Records a failed request for an ID.
+
+        Args:
+            id (str): The ID whose request failed.
+            endpoint (str): The endpoint that was requested.
+            err (Exception): The error raised by the request.
+            status (int): The HTTP status code, if a response was received. Defaults to None.
+
+        Returns:
+            dict: The updated failure record.
+        """
+        with self._lock:
+            previous = self.failures.get(id, {})
+            failure = {
+                "id": id,
+                "endpoint": endpoint,
+                "error": type(err).__name__,
+                "status": status,
+                "attempts": previous.get("attempts", 0) + 1,
+                "lastAttempt": time(),
+                "nextAttempt": 0.0,
+            }
+            self.failures[id] = failure
+            self._append({"event": "failed"} | failure)
+        return failure
+
+    def defer(self, id: str, next_attempt: float) -> None:
+        """Postpones the next retry of an ID.
+
+        Args:
+            id (str): The failed ID.
+            next_attempt (float): The epoch time before which the ID should not be retried.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            if id in self.failures:
+                self.failures[id]["nextAttempt"] = next_attempt
+                self._append(
+                    {"event": "deferred", "id": id, "nextAttempt": next_attempt}
+                )
+
+    def resolve(self, id: str) -> None:
+        """Removes an ID from the store after a successful request.
+
+        Args:
+            id (str): The ID that was fetched successfully.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            if self.failures.pop(id, None) is not None:
+                self._append({"event": "resolved", "id": id})
+
+    def pending(
+        self,
+        endpoint: Optional[str] = None,
+        ids: Optional[Set[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Returns the unresolved failures.
+
+        Args:
+            endpoint (str): Only return failures of this endpoint. Defaults to None.
+            ids (set): Only return failures of these IDs. Defaults to None.
+
+        Returns:
+            list: The failure records, oldest failure first.
+        """
+        with self._lock:
+            failures = sorted(self.failures.values(), key=lambda f: f["lastAttempt"])
+        return [
+            failure
+            for failure in failures
+            if (endpoint is None or failure["endpoint"] == endpoint)
+            and (ids is None or failure["id"] in ids)
+        ]
+
+    def due(
+        self,
+        now: Optional[float] = None,
+        endpoint: Optional[str] = None,
+        ids: Optional[Set[str]] = None,
+    ) -> List[str]:
+        """Returns the IDs whose backoff has elapsed.
+
+        Args:
+            now (float): The current epoch time. Defaults to None, which uses time().
+            endpoint (str): Only return IDs that failed on this endpoint. Defaults to None.
+            ids (set): Only return these IDs. Defaults to None.
+
+        Returns:
+            list: The IDs, oldest failure first.
+        """
+        now = time() if now is None else now
+        return [
+            failure["id"]
+            for failure in self.pending(endpoint, ids)
+            if failure["nextAttempt"] <= now
+        ]
+
+    def compact(self) -> None:
+        """Rewrites the file with only the unresolved failures.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            with self.path.open(mode="w") as f:
+                for failure in self.failures.values():
+                    f.write(json.dumps({"event": "failed"} | failure) + "\n")
+
+
+class RetryScheduler(object):
+    """Replays the IDs in a dead-letter store with exponential backoff and jitter.
+
+    Only the failed IDs are requested again, so recovering from a partial outage costs
+    as many requests as there were failures. Only failures of the handler's endpoint
+    are replayed, optionally narrowed to a set of IDs. The handler must have the same
+    store set through `set_dead_letter_store`, so that successes resolve their IDs and
+    failures are recorded.
+
+    An ID is retried at most `max_attempts` times per run. IDs that still fail stay in
+    the store, so an outage that outlasts the backoff is recovered by a later run.
+
+    Args:
+        handler (APIHandler): An entered request handler used to replay the IDs.
+        store (DeadLetterStore): The store holding the failed IDs.
+        max_attempts (int): The number of retries of an ID per run.
+        base_delay (float): The backoff delay after the first retry, in seconds.
+        max_delay (float): The upper bound of the backoff delay, in seconds.
+
+    Methods:
+        backoff(attempts): Returns the delay before the next attempt.
+        run(ids): Replays the failed IDs until none are left to retry in this run.
+        start(callback, ids): Replays the failed IDs in a background thread.
+        stop(): Stops the background thread after the current request.
+    """
+
+    def __init__(
+        self,
+        handler,
+        store: DeadLetterStore,
+        max_attempts: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 300.0,
+    ):
+        self.handler = handler
+        self.store = store
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def backoff(self, attempts: int) -> float:
+        """Returns the delay before the next attempt, with full jitter.
+
+        Args:
+            attempts (int): The number of attempts made so far.
+
+        Returns:
+            float: The delay in seconds.
+        """
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        return random.uniform(0, delay)
+
+    def run(
+        self, ids: Optional[Iterable[str]] = None
+    ) -> Generator[Dict[str, Any], None, None]:
+        """Replays the failed IDs until none are left to retry in this run.
+
+        Args:
+            ids (iterable): Only replay failures of these IDs, such as the IDs of the
+                requested range. Defaults to None, which replays all failures of the
+                handler's endpoint.
+
+        Yields:
+            dict: A dictionary mapping each recovered ID to its fetched data.
+        """
+        ids = set(ids) if ids is not None else None
+        endpoint = self.handler.url
+        attempts: Dict[str, int] = {}
+        while not self._stopped.is_set():
+            retryable = [
+                failure
+                for failure in self.store.pending(endpoint, ids)
+                if attempts.get(failure["id"], 0) < self.max_attempts
+            ]
+            if not retryable:
+                break
+
+            # The backoff left over from a previous run does not delay the first retry
+            now = time()
+            due = [
+                failure["id"]
+                for failure in retryable
+                if failure["id"] not in attempts or failure["nextAttempt"] <= now
+            ]
+            if not due:
+                wait = min(failure["nextAttempt"] for failure in retryable) - now
+                self._stopped.wait(max(wait, 0.0))
+                continue
+
+            for id in due:
+                if self._stopped.is_set():
+                    break
+                attempts[id] = attempts.get(id, 0) + 1
+                attempt = self.store.failures[id]["attempts"] + 1
+                for data in self.handler.fetch(id, attempt=attempt):
+                    yield {id: data}
+                if id in self.store:
+                    self.store.defer(id, time() + self.backoff(attempts[id]))
+                sleep(self.handler.throttle)
+
+        remaining = len(self.store.pending(endpoint, ids))
+        if remaining:
+            logging.warning(
+                "Retry scheduler stopped with %d IDs left for a later run.", remaining
+            )
+
+    def start(
+        self,
+        callback: Callable[[Dict[str, Any]], None],
+        ids: Optional[Iterable[str]] = None,
+    ) -> threading.Thread:
+        """Replays the failed IDs in a background thread.
+
+        Args:
+            callback (callable): A function called with each recovered `{id: data}` record.
+            ids (iterable): Only replay failures of these IDs. Defaults to None.
+
+        Returns:
+            threading.Thread: The started thread.
+        """
+
+        def worker():
+            for record in self.run(ids):
+                callback(record)
+
+        self._stopped.clear()
+        self._thread = threading.Thread(target=worker, daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self) -> None:
+        """Stops the background thread after the current request.
+
+        Returns:
+            None
+        """
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
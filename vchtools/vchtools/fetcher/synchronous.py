@@ -2,9 +2,13 @@ import json
 import logging
 import requests
 
-from time import sleep
+from time import sleep, perf_counter, thread_time
 from urllib3.util.retry import Retry
 from requests.adapters import HTTPAdapter
+from vchtools.archive import ArchiveWriter
+from vchtools.profiler import Profiler
+from vchtools.projection import Projection
+from vchtools.fetcher.deadletter import DeadLetterStore
 from typing import Iterable, Generator, List, Dict, Any, Tuple, Callable
 
 
@@ -25,12 +29,21 @@ class APIHandler(object):
         n_attempts (int): The number of retry attempts for failed requests.
         throttle (float): The time to wait between requests in seconds.
         session (requests.Session): The session object for making requests.
+        dead_letters (DeadLetterStore): The store recording failed IDs, if any.
+        archive (ArchiveWriter): The archive the raw responses are written to, if any.
+        projection (Projection): The fields kept when decoding responses, if any.
+        profiler (Profiler): The profiler request and decode times are recorded in, if any.
 
     Methods:
         __enter__(): Enter method for using the class as a context manager.
         __exit__(exc_type, exc_val, exc_tb): Exit method for cleaning up resources.
+        set_dead_letter_store(store): Sets the store recording failed IDs.
+        set_archive(archive): Sets the archive the raw responses are written to.
+        set_projection(projection): Sets the fields kept when decoding responses.
+        set_profiler(profiler): Sets the profiler request and decode times are recorded in.
         fetch_all(ids, start, finish): Fetches inspection reports for a range of IDs.
         fetch(id): Fetches the inspection report for a specific ID.
+        fetch_keyed(id): Fetches the data for a specific ID, keyed by the ID.
     """
 
     def __init__(self, url, method, headers, n_attempts, timeout, throttle):
@@ -41,6 +54,10 @@ class APIHandler(object):
         self.throttle = throttle
         self.timeout = timeout
         self.session = None
+        self.dead_letters = None
+        self.archive = None
+        self.projection = None
+        self.profiler = None
 
     def __enter__(self):
         self.session = requests.Session()
@@ -62,6 +79,68 @@ class APIHandler(object):
         if self.session:
             self.session.close()
 
+    def set_dead_letter_store(self, store: DeadLetterStore) -> None:
+        """Sets the store recording failed IDs.
+
+        Failed requests are recorded in the store instead of only being logged, and
+        IDs that are fetched successfully are removed from it.
+
+        Args:
+            store (DeadLetterStore): The dead-letter store.
+        """
+        self.dead_letters = store
+
+    def set_archive(self, archive: ArchiveWriter) -> None:
+        """Sets the archive the raw responses are written to.
+
+        Args:
+            archive (ArchiveWriter): The archive writer.
+        """
+        self.archive = archive
+
+    def set_projection(self, projection: Projection) -> None:
+        """Sets the fields kept when decoding responses.
+
+        Args:
+            projection (Projection): The projection applied to each response, or None
+                to keep every field.
+        """
+        self.projection = projection
+
+    def set_profiler(self, profiler: Profiler) -> None:
+        """Sets the profiler request and decode times are recorded in.
+
+        Requests are recorded under "fetch.request", response decoding under
+        "fetch.decode", projection under "fetch.project" and success logging under
+        "fetch.log". The stages do not overlap.
+
+        Args:
+            profiler (Profiler): The profiler.
+        """
+        self.profiler = profiler
+
+    def _archive_response(self, id: str, response: requests.Response) -> None:
+        if self.archive is not None:
+            self.archive.add(self.url, id, response.content)
+
+    def _decode_response(self, content: bytes) -> Any:
+        # Responses are small enough that json.loads outruns a streaming parser, so
+        # the projection is applied to the decoded response
+        wall, cpu = perf_counter(), thread_time()
+        data = json.loads(content)
+        if self.profiler is not None:
+            self.profiler.record(
+                "fetch.decode", perf_counter() - wall, thread_time() - cpu
+            )
+        if self.projection is not None:
+            wall, cpu = perf_counter(), thread_time()
+            data = self.projection.apply(data)
+            if self.profiler is not None:
+                self.profiler.record(
+                    "fetch.project", perf_counter() - wall, thread_time() - cpu
+                )
+        return data
+
     def fetch_all(
         self, ids: Iterable[str]
     ) -> Generator[Dict[str, List[Dict[str, Any]]], None, None]:
@@ -90,14 +169,15 @@ class APIHandler(object):
         Yields:
             dict: The fetched records within the specified range.
         """
-        logging.info(f"Fetching records in range: [{start}, {finish}).")
+        logging.info("Fetching records in range: [%d, %d).", start, finish)
         yield from self.fetch_all(ids[start:finish])
 
-    def fetch(self, id: str) -> Generator[Dict[str, Any], None, None]:
+    def fetch(self, id: str, attempt: int = 1) -> Generator[Dict[str, Any], None, None]:
         """Fetches the inspection report for a specific ID.
 
         Args:
             id (str): The ID.
+            attempt (int): The attempt number, reported in the log records. Defaults to 1.
 
         Yields:
             dict: The JSON response for the ID.
@@ -109,23 +189,102 @@ class APIHandler(object):
             requests.exceptions.RequestException: If a general request error occurs.
             requests.exceptions.ChunkedEncodingError: If a chunked encoding error occurs.
         """
+        extra = {"id": id, "endpoint": self.url, "attempt": attempt, "status": None}
+        start, cpu = perf_counter(), thread_time()
         try:
-            status_code, data = self._submit_request(id)
-            yield data
-            logging.info(f"Successfully fetched data for ID: {id}")
-        except requests.exceptions.HTTPError as err:
-            if status_code == 429:
-                logging.error(f"Rate limit exceeded: {data} - ID: {id}")
-            else:
-                logging.error(f"HTTP error occurred: {err} - ID: {id}")
-        except requests.exceptions.ConnectionError as err:
-            logging.error(f"Connection error occurred: {err} - ID: {id}")
-        except requests.exceptions.Timeout as err:
-            logging.error(f"Timeout error occurred: {err} - ID: {id}")
+            extra["status"], content = self._submit_request(id)
         except requests.exceptions.RequestException as err:
-            logging.error(f"Error fetching data: {err} - ID: {id}")
-        except requests.exceptions.ChunkedEncodingError as err:
-            logging.error(f"Chunked Encoding Error: {err} - ID: {id}")
+            extra["latency"] = perf_counter() - start
+            if self.profiler is not None:
+                self.profiler.record(
+                    "fetch.request", extra["latency"], thread_time() - cpu, records=0
+                )
+            self._record_failure(err, extra)
+            return
+
+        extra["latency"] = perf_counter() - start
+        if self.profiler is not None:
+            self.profiler.record("fetch.request", extra["latency"], thread_time() - cpu)
+
+        try:
+            data = self._decode_response(content)
+        except ValueError as err:
+            self._record_failure(err, extra)
+            return
+        if self.dead_letters is not None:
+            self.dead_letters.resolve(id)
+
+        start, cpu = perf_counter(), thread_time()
+        logging.info(
+            "Successfully fetched data for ID: %s", id, extra=extra | {"sampled": True}
+        )
+        if self.profiler is not None:
+            self.profiler.record(
+                "fetch.log", perf_counter() - start, thread_time() - cpu
+            )
+        yield data
+
+    def fetch_keyed(
+        self, id: str, attempt: int = 1
+    ) -> Generator[Dict[str, Any], None, None]:
+        """Fetches the data for a specific ID, keyed by the ID.
+
+        Args:
+            id (str): The ID.
+            attempt (int): The attempt number, reported in the log records. Defaults to 1.
+
+        Yields:
+            dict: A dictionary mapping the ID to its JSON response.
+        """
+        for data in self.fetch(id, attempt=attempt):
+            yield {id: data}
+
+    def _record_failure(self, err: Exception, extra: Dict[str, Any]) -> None:
+        """Logs a failed request and records it in the dead-letter store, if any.
+
+        Args:
+            err (Exception): The error raised by the request or the decode.
+            extra (dict): The structured fields of the request.
+
+        Returns:
+            None
+        """
+        self._log_failure(err, extra)
+        if self.dead_letters is not None:
+            self.dead_letters.record(extra["id"], self.url, err, extra["status"])
+
+    def _log_failure(self, err: Exception, extra: Dict[str, Any]) -> None:
+        """Logs a failed request with its structured fields.
+
+        Args:
+            err (Exception): The error raised by the request or the decode.
+            extra (dict): The structured fields of the request.
+
+        Returns:
+            None
+        """
+        id = extra["id"]
+        if isinstance(err, requests.exceptions.HTTPError):
+            extra["status"] = err.response.status_code
+            if extra["status"] == 429:
+                logging.error(
+                    "Rate limit exceeded: %s - ID: %s",
+                    err.response.text,
+                    id,
+                    extra=extra,
+                )
+            else:
+                logging.error("HTTP error occurred: %s - ID: %s", err, id, extra=extra)
+        elif isinstance(err, requests.exceptions.ConnectionError):
+            logging.error(
+                "Connection error occurred: %s - ID: %s", err, id, extra=extra
+            )
+        elif isinstance(err, requests.exceptions.Timeout):
+            logging.error("Timeout error occurred: %s - ID: %s", err, id, extra=extra)
+        elif isinstance(err, requests.exceptions.ChunkedEncodingError):
+            logging.error("Chunked Encoding Error: %s - ID: %s", err, id, extra=extra)
+        else:
+            logging.error("Error fetching data: %s - ID: %s", err, id, extra=extra)
 
     def _submit_request(self, id):
         raise NotImplementedError("Subclasses must implement this method.")
@@ -170,14 +329,14 @@ class GETRequestHandler(APIHandler):
         """
         return self.url % id
 
-    def _submit_request(self, id: str) -> Tuple[int, Dict[str, Any]]:
+    def _submit_request(self, id: str) -> Tuple[int, bytes]:
         """Submits the request and returns the response.
 
         Args:
             id (str): The ID to be included in the URL.
 
         Returns:
-            tuple: A tuple containing the status code and the JSON response.
+            tuple: A tuple containing the status code and the raw response body.
 
         Raises:
             requests.HTTPError: If the response status code is not successful.
@@ -186,7 +345,8 @@ class GETRequestHandler(APIHandler):
             method=self.method, url=self._build_url(id), timeout=self.timeout
         ) as response:
             response.raise_for_status()
-            return response.status_code, response.json()
+            self._archive_response(id, response)
+            return response.status_code, response.content
 
 
 class POSTRequestHandler(APIHandler):
@@ -233,14 +393,14 @@ class POSTRequestHandler(APIHandler):
         else:
             return json.dumps({"id": id})
 
-    def _submit_request(self, id: str) -> Tuple[int, Dict[str, Any]]:
+    def _submit_request(self, id: str) -> Tuple[int, bytes]:
         """Submits the request and returns the response.
 
         Args:
             id (str): The ID to include in the request.
 
         Returns:
-            tuple: A tuple containing the status code and the response JSON.
+            tuple: A tuple containing the status code and the raw response body.
 
         Raises:
             HTTPError: If the request fails.
@@ -252,4 +412,5 @@ class POSTRequestHandler(APIHandler):
             timeout=self.timeout,
         ) as response:
             response.raise_for_status()
-            return response.status_code, response.json()
+            self._archive_response(id, response)
+            return response.status_code, response.content
@@ -27,6 +27,9 @@ class ThreadedRequestHandlerMixin(object):
     ) -> Generator[Dict[str, Any], None, None]:
         """Executes multiple requests concurrently using a thread pool.
 
+        Each worker function call runs to completion on a worker thread, so the
+        requests, decoding and logging of different IDs overlap.
+
         Args:
             ids (list): A list of IDs to be requested.
             worker_func (callable): The worker function that will be called for each task.
@@ -35,14 +38,18 @@ class ThreadedRequestHandlerMixin(object):
         Yields:
             The results of the worker function for each ID.
         """
+        # The worker functions are generators, which do no work until they are
+        # consumed, so they are drained on the worker threads
         with ThreadPoolExecutor(max_workers=n_workers) as executor:
-            futures = {executor.submit(worker_func, id): id for id in ids}
+            futures = {
+                executor.submit(lambda id: list(worker_func(id)), id): id for id in ids
+            }
             for future in as_completed(futures):
                 task = futures[future]
                 try:
                     yield from future.result()
                 except Exception as exc:
-                    logging.error(f"Error processing task {task}: {exc}")
+                    logging.error("Error processing task %s: %s", task, exc)
 
 
 class ThreadedGETRequestHandler(GETRequestHandler, ThreadedRequestHandlerMixin):
@@ -60,21 +67,30 @@ class ThreadedGETRequestHandler(GETRequestHandler, ThreadedRequestHandlerMixin):
     """
 
     def fetch_all_threaded(
-        self, ids: List[str], n_workers: int
+        self, ids: List[str], n_workers: int, keyed: bool = False
     ) -> Generator[Dict[str, Any], None, None]:
         """Fetches all records in a threaded manner.
 
+        Records are yielded in completion order, not in the order of `ids`.
+
         Args:
             ids (list): A list of record IDs to fetch.
             n_workers (int): The number of worker threads to use.
+            keyed (bool): Whether to yield each record as `{id: data}`. Defaults to False.
 
         Yields:
             A dictionary containing the fetched data for each ID.
         """
-        return self.execute_requests_threaded(ids, self.fetch, n_workers)
+        worker_func = self.fetch_keyed if keyed else self.fetch
+        return self.execute_requests_threaded(ids, worker_func, n_workers)
 
     def fetch_ranged_threaded(
-        self, ids: List[str], start: int, finish: int, n_workers: int
+        self,
+        ids: List[str],
+        start: int,
+        finish: int,
+        n_workers: int,
+        keyed: bool = False,
     ) -> Generator[Dict[str, Any], None, None]:
         """Fetches a range of records in parallel using multiple worker threads.
 
@@ -83,13 +99,14 @@ class ThreadedGETRequestHandler(GETRequestHandler, ThreadedRequestHandlerMixin):
             start (int): The starting index of the range.
             finish (int): The ending index of the range.
             n_workers (int): The number of worker threads to use.
+            keyed (bool): Whether to yield each record as `{id: data}`. Defaults to False.
 
         Yields:
             The fetched records within the specified range.
         """
-        logging.info(f"Fetching records in range: [{start}, {finish}).")
+        logging.info("Fetching records in range: [%d, %d).", start, finish)
         sliced_ids = ids[start:finish]
-        yield from self.fetch_all_threaded(sliced_ids, n_workers)
+        yield from self.fetch_all_threaded(sliced_ids, n_workers, keyed=keyed)
 
 
 class ThreadedPOSTRequestHandler(POSTRequestHandler, ThreadedRequestHandlerMixin):
@@ -106,21 +123,30 @@ class ThreadedPOSTRequestHandler(POSTRequestHandler, ThreadedRequestHandlerMixin
     """
 
     def fetch_all_threaded(
-        self, ids: List[str], n_workers: int
+        self, ids: List[str], n_workers: int, keyed: bool = False
     ) -> Generator[Dict[str, Any], None, None]:
         """Fetches all records in a threaded manner.
 
+        Records are yielded in completion order, not in the order of `ids`.
+
         Args:
             ids (list): A list of record IDs to fetch.
             n_workers (int): The number of worker threads to use.
+            keyed (bool): Whether to yield each record as `{id: data}`. Defaults to False.
 
         Yields:
             A dictionary containing the fetched data for each ID.
         """
-        return self.execute_requests_threaded(ids, self.fetch, n_workers)
+        worker_func = self.fetch_keyed if keyed else self.fetch
+        return self.execute_requests_threaded(ids, worker_func, n_workers)
 
     def fetch_ranged_threaded(
-        self, ids: List[str], start: int, finish: int, n_workers: int
+        self,
+        ids: List[str],
+        start: int,
+        finish: int,
+        n_workers: int,
+        keyed: bool = False,
     ) -> Generator[Dict[str, Any], None, None]:
         """Fetches records within a specified range in a threaded manner.
 
@@ -129,10 +155,11 @@ class ThreadedPOSTRequestHandler(POSTRequestHandler, ThreadedRequestHandlerMixin
             start (int): The starting index of the range.
             finish (int): The ending index of the range.
             n_workers (int): The number of worker threads to use.
+            keyed (bool): Whether to yield each record as `{id: data}`. Defaults to False.
 
         Yields:
             The fetched records within the specified range.
         """
-        logging.info(f"Fetching records in range: [{start}, {finish}).")
+        logging.info("Fetching records in range: [%d, %d).", start, finish)
         sliced_ids = ids[start:finish]
-        yield from self.fetch_all_threaded(sliced_ids, n_workers)
+        yield from self.fetch_all_threaded(sliced_ids, n_workers, keyed=keyed)
@@ -0,0 +1,338 @@
+import json
+import math
+import struct
+
+from array import array
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from datetime import date as Date, datetime, time, timezone
+from typing import Iterable, Generator, Optional, Tuple, List, Dict, Set, Any
+
+HISTORY_FILENAME = "history.bin"
+HEADER_LENGTH = struct.Struct("<Q")
+
+# Column names and array typecodes, in the order they are stored
+COLUMNS = (
+    ("timestamps", "q"),
+    ("critical", "i"),
+    ("non_critical", "i"),
+    ("hazard_scores", "d"),
+    ("hazard_ratings", "h"),
+)
+
+
+def to_timestamp(date: str, end_of_day: bool = False) -> int:
+    """Converts an ISO 8601 date to epoch seconds.
+
+    Args:
+        date (str): The date, such as an `inspectionDate`. Dates without a timezone
+            are taken to be in UTC.
+        end_of_day (bool): Whether a date without a time part stands for the last
+            second of the day rather than midnight, as the inclusive end of a range
+            does. Defaults to False.
+
+    Returns:
+        int: The epoch seconds.
+    """
+    try:
+        day = Date.fromisoformat(date)
+    except ValueError:
+        parsed = datetime.fromisoformat(date)
+    else:
+        parsed = datetime.combine(day, time.max if end_of_day else time.min)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+class FacilityHistory(object):
+    """The date-sorted inspection series of a facility, stored column-wise in arrays.
+
+    Hazard scores are NaN and hazard ratings are -1 when the report has none. Hazard
+    ratings are stored as codes into the rating vocabulary of the `HistoryIndex`.
+
+    Attributes:
+        timestamps (array): The inspection times, in epoch seconds.
+        critical (array): The critical infraction counts.
+        non_critical (array): The non-critical infraction counts.
+        hazard_scores (array): The hazard scores.
+        hazard_ratings (array): The hazard rating codes.
+
+    Methods:
+        append(timestamp, critical, non_critical, hazard_score, hazard_rating): Adds an inspection.
+        between(start, end): Returns the index range of inspections between two times.
+        as_of(timestamp): Returns the index of the latest inspection at a time.
+    """
+
+    def __init__(self):
+        for name, typecode in COLUMNS:
+            setattr(self, name, array(typecode))
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def append(
+        self,
+        timestamp: int,
+        critical: int,
+        non_critical: int,
+        hazard_score: float,
+        hazard_rating: int,
+    ) -> None:
+        """Adds an inspection, keeping the series sorted by time.
+
+        Inspections usually arrive in date order and are appended; older inspections
+        are inserted at their sorted position.
+
+        Args:
+            timestamp (int): The inspection time, in epoch seconds.
+            critical (int): The critical infraction count.
+            non_critical (int): The non-critical infraction count.
+            hazard_score (float): The hazard score, NaN if there is none.
+            hazard_rating (int): The hazard rating code, -1 if there is none.
+
+        Returns:
+            None
+        """
+        values = (timestamp, critical, non_critical, hazard_score, hazard_rating)
+        if not self.timestamps or timestamp >= self.timestamps[-1]:
+            for (name, _), value in zip(COLUMNS, values):
+                getattr(self, name).append(value)
+            return
+
+        position = bisect_right(self.timestamps, timestamp)
+        for (name, _), value in zip(COLUMNS, values):
+            getattr(self, name).insert(position, value)
+
+    def between(self, start: int, end: int) -> Tuple[int, int]:
+        """Returns the index range of inspections between two times.
+
+        Args:
+            start (int): The start time, in epoch seconds (inclusive).
+            end (int): The end time, in epoch seconds (inclusive).
+
+        Returns:
+            tuple: The start (inclusive) and end (exclusive) indices into the columns.
+        """
+        return bisect_left(self.timestamps, start), bisect_right(self.timestamps, end)
+
+    def as_of(self, timestamp: int) -> Optional[int]:
+        """Returns the index of the latest inspection at a time.
+
+        Args:
+            timestamp (int): The time, in epoch seconds.
+
+        Returns:
+            int: The index into the columns, or None if there was no inspection yet.
+        """
+        position = bisect_right(self.timestamps, timestamp)
+        return position - 1 if position else None
+
+
+class HistoryIndex(object):
+    """Per-facility inspection histories with range and as-of queries.
+
+    Reports are folded in once, by report ID, so the index can be updated with the
+    output of each crawl without re-reading earlier data.
+
+    Attributes:
+        facilities (dict): The inspection series, keyed by facility ID.
+        ratings (list): The hazard rating vocabulary the rating codes index into.
+        sources (set): The names of source files that have been ingested.
+
+    Methods:
+        ingest(facility_id, reports): Adds inspection reports to a facility history.
+        between(facility_id, start, end): Returns the inspections of a facility between two dates.
+        hazard_rating(facility_id, date): Returns the hazard rating of a facility on a date.
+        trajectories(start, end): Yields the inspection windows of all facilities.
+        save(path): Saves the index to a binary file.
+        load(path): Loads the index from a binary file.
+    """
+
+    def __init__(self):
+        self.facilities: Dict[str, FacilityHistory] = {}
+        self.ratings: List[str] = []
+        self.sources: Set[str] = set()
+        self._rating_codes: Dict[str, int] = {}
+        self._ingested_reports: Set[str] = set()
+
+    def _rating_code(self, rating: Optional[str]) -> int:
+        if rating is None:
+            return -1
+        if rating not in self._rating_codes:
+            self._rating_codes[rating] = len(self.ratings)
+            self.ratings.append(rating)
+        return self._rating_codes[rating]
+
+    def ingest(self, facility_id: str, reports: Iterable[Dict[str, Any]]) -> int:
+        """Adds inspection reports to a facility history.
+
+        Args:
+            facility_id (str): The ID of the facility the reports belong to.
+            reports (iterable): The inspection reports, as returned by the inspection
+                details endpoint.
+
+        Returns:
+            int: The number of reports that had not been ingested before.
+        """
+        history = self.facilities.setdefault(facility_id, FacilityHistory())
+        new_reports = sorted(
+            {
+                report["id"]: report
+                for report in reports
+                if report["id"] not in self._ingested_reports
+            }.values(),
+            key=lambda report: report["inspectionDate"],
+        )
+
+        for report in new_reports:
+            self._ingested_reports.add(report["id"])
+            hazard_score = report.get("hazardScore")
+            history.append(
+                to_timestamp(report["inspectionDate"]),
+                report["criticalInfractionCount"],
+                report["nonCriticalInfractionCount"],
+                math.nan if hazard_score is None else hazard_score,
+                self._rating_code(report.get("hazardRating")),
+            )
+        return len(new_reports)
+
+    def between(self, facility_id: str, start: str, end: str) -> List[Dict[str, Any]]:
+        """Returns the inspections of a facility between two dates.
+
+        Args:
+            facility_id (str): The ID of the facility.
+            start (str): The ISO 8601 start date (inclusive).
+            end (str): The ISO 8601 end date (inclusive). A date without a time part
+                includes the whole day.
+
+        Returns:
+            list: The inspections, in date order.
+        """
+        history = self.facilities.get(facility_id)
+        if history is None:
+            return []
+        first, last = history.between(
+            to_timestamp(start), to_timestamp(end, end_of_day=True)
+        )
+        return [self._inspection(history, i) for i in range(first, last)]
+
+    def hazard_rating(self, facility_id: str, date: str) -> Optional[str]:
+        """Returns the hazard rating of a facility on a date.
+
+        Args:
+            facility_id (str): The ID of the facility.
+            date (str): The ISO 8601 date. A date without a time part includes the
+                inspections of that day.
+
+        Returns:
+            str: The hazard rating of the latest inspection on or before the date, or
+                None if there was none.
+        """
+        history = self.facilities.get(facility_id)
+        if history is None:
+            return None
+        i = history.as_of(to_timestamp(date, end_of_day=True))
+        if i is None or history.hazard_ratings[i] < 0:
+            return None
+        return self.ratings[history.hazard_ratings[i]]
+
+    def trajectories(
+        self, start: str, end: str
+    ) -> Generator[Tuple[str, FacilityHistory, int, int], None, None]:
+        """Yields the inspection windows of all facilities between two dates.
+
+        Args:
+            start (str): The ISO 8601 start date (inclusive).
+            end (str): The ISO 8601 end date (inclusive). A date without a time part
+                includes the whole day.
+
+        Yields:
+            tuple: The facility ID, its history, and the start (inclusive) and end
+                (exclusive) indices of the window into the history columns.
+        """
+        start, end = to_timestamp(start), to_timestamp(end, end_of_day=True)
+        for facility_id, history in self.facilities.items():
+            first, last = history.between(start, end)
+            if first < last:
+                yield facility_id, history, first, last
+
+    def _inspection(self, history: FacilityHistory, i: int) -> Dict[str, Any]:
+        hazard_score = history.hazard_scores[i]
+        hazard_rating = history.hazard_ratings[i]
+        return {
+            "inspectionDate": datetime.fromtimestamp(
+                history.timestamps[i], tz=timezone.utc
+            ).isoformat(),
+            "criticalInfractionCount": history.critical[i],
+            "nonCriticalInfractionCount": history.non_critical[i],
+            "hazardScore": None if math.isnan(hazard_score) else hazard_score,
+            "hazardRating": self.ratings[hazard_rating] if hazard_rating >= 0 else None,
+        }
+
+    def save(self, path: Path) -> None:
+        """Saves the index to a binary file.
+
+        The file holds a JSON header followed by each column of every facility
+        concatenated into one contiguous block.
+
+        Args:
+            path (Path): The path of the file to write.
+
+        Returns:
+            None
+        """
+        facility_ids = list(self.facilities)
+        header = json.dumps(
+            {
+                "facilities": facility_ids,
+                "lengths": [len(self.facilities[id]) for id in facility_ids],
+                "ratings": self.ratings,
+                "sources": sorted(self.sources),
+                "ingestedReports": sorted(self._ingested_reports),
+            }
+        ).encode("utf-8")
+
+        with open(path, "wb") as f:
+            f.write(HEADER_LENGTH.pack(len(header)))
+            f.write(header)
+            for name, _ in COLUMNS:
+                for id in facility_ids:
+                    getattr(self.facilities[id], name).tofile(f)
+
+    @classmethod
+    def load(cls, path: Path) -> "HistoryIndex":
+        """Loads the index from a binary file.
+
+        Args:
+            path (Path): The path of the file to read. If it does not exist, an empty
+                index is returned.
+
+        Returns:
+            HistoryIndex: The loaded index.
+        """
+        index = cls()
+        if not Path(path).exists():
+            return index
+
+        with open(path, "rb") as f:
+            (header_length,) = HEADER_LENGTH.unpack(f.read(HEADER_LENGTH.size))
+            header = json.loads(f.read(header_length))
+
+            index.ratings = header["ratings"]
+            index._rating_codes = {rating: i for i, rating in enumerate(index.ratings)}
+            index.sources = set(header["sources"])
+            index._ingested_reports = set(header["ingestedReports"])
+            index.facilities = {id: FacilityHistory() for id in header["facilities"]}
+
+            total = sum(header["lengths"])
+            for name, typecode in COLUMNS:
+                column = array(typecode)
+                column.fromfile(f, total)
+                offset = 0
+                for id, length in zip(header["facilities"], header["lengths"]):
+                    setattr(
+                        index.facilities[id], name, column[offset : offset + length]
+                    )
+                    offset += length
+        return index
@@ -0,0 +1,468 @@
+import json
+import mmap
+import uuid
+import struct
+
+from pathlib import Path
+from typing import Iterable, Generator, Optional, Tuple, List, Dict, Any
+
+MAGIC = b"VCHIDX01"
+HEADER = struct.Struct("<8sII")
+SLOT = struct.Struct("<16sQI")
+EMPTY_KEY = bytes(16)
+
+FACILITIES_FILENAME = "facilities.idx"
+COMMUNITY_FACILITIES_FILENAME = "community_facilities.idx"
+FACILITY_INSPECTIONS_FILENAME = "facility_inspections.idx"
+REPORT_ENTRIES_FILENAME = "report_entries.idx"
+
+
+def _slot_number(key: bytes, n_slots: int) -> int:
+    return int.from_bytes(key[:8], "little") % n_slots
+
+
+def community_key(community: str) -> str:
+    """Returns the index key of a community.
+
+    Args:
+        community (str): The name of the community.
+
+    Returns:
+        str: A UUID derived from the community name.
+    """
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"community#{community}"))
+
+
+def write_index(path: Path, mapping: Dict[str, bytes]) -> None:
+    """Writes a mapping of UUIDs to byte payloads as an open addressing hash table.
+
+    The file holds a header, a table of fixed size slots with linear probing, and the
+    concatenated payloads. Each slot stores a key with the offset and length of its
+    payload, so a lookup reads one or a few slots and a single payload. Empty slots
+    have an offset of 0, which no payload has, so every UUID can be used as a key.
+
+    Args:
+        path (Path): The path of the index file to write.
+        mapping (dict): A mapping of UUID strings to their payloads.
+
+    Returns:
+        None
+    """
+    n_slots = max(1, 2 * len(mapping))
+    slots: List[Optional[Tuple[bytes, int, int]]] = [None] * n_slots
+    data_offset = HEADER.size + n_slots * SLOT.size
+
+    payloads = []
+    offset = data_offset
+    for key, payload in mapping.items():
+        key_bytes = uuid.UUID(key).bytes
+        slot_number = _slot_number(key_bytes, n_slots)
+        while slots[slot_number] is not None:
+            slot_number = (slot_number + 1) % n_slots
+        slots[slot_number] = (key_bytes, offset, len(payload))
+        payloads.append(payload)
+        offset += len(payload)
+
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, n_slots, len(mapping)))
+        for slot in slots:
+            f.write(
+                SLOT.pack(*slot) if slot is not None else SLOT.pack(EMPTY_KEY, 0, 0)
+            )
+        for payload in payloads:
+            f.write(payload)
+
+
+def encode_ids(ids: Iterable[str]) -> bytes:
+    """Encodes UUID strings as concatenated 16 byte values.
+
+    Args:
+        ids (iterable): The UUID strings.
+
+    Returns:
+        bytes: The encoded UUIDs.
+    """
+    return b"".join(uuid.UUID(id).bytes for id in ids)
+
+
+def decode_ids(payload: bytes) -> List[str]:
+    """Decodes concatenated 16 byte values into UUID strings.
+
+    Args:
+        payload (bytes): The encoded UUIDs.
+
+    Returns:
+        list: The UUID strings.
+    """
+    return [
+        str(uuid.UUID(bytes=bytes(payload[i : i + 16])))
+        for i in range(0, len(payload), 16)
+    ]
+
+
+class HashIndex(object):
+    """A memory-mapped reader for index files written by `write_index`.
+
+    Args:
+        path (Path): The path of the index file.
+
+    Methods:
+        get(key): Returns the payload for a UUID.
+        keys(): Yields the UUIDs in the index.
+        close(): Unmaps the index file.
+    """
+
+    def __init__(self, path: Path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.n_slots, self.n_keys = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Not an index file: {path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        return self.n_keys
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Returns the payload for a UUID.
+
+        Args:
+            key (str): The UUID string to look up.
+
+        Returns:
+            bytes: The payload, or None if the key is not in the index.
+        """
+        key_bytes = uuid.UUID(key).bytes
+        slot_number = _slot_number(key_bytes, self.n_slots)
+        for _ in range(self.n_slots):
+            slot_key, offset, length = SLOT.unpack_from(
+                self._mmap, HEADER.size + slot_number * SLOT.size
+            )
+            if offset == 0:
+                return None
+            if slot_key == key_bytes:
+                return self._mmap[offset : offset + length]
+            slot_number = (slot_number + 1) % self.n_slots
+        return None
+
+    def keys(self) -> Generator[str, None, None]:
+        """Yields the UUIDs in the index, in slot order.
+
+        Yields:
+            str: The UUID strings.
+        """
+        for slot_number in range(self.n_slots):
+            slot_key, offset, _ = SLOT.unpack_from(
+                self._mmap, HEADER.size + slot_number * SLOT.size
+            )
+            if offset != 0:
+                yield str(uuid.UUID(bytes=slot_key))
+
+    def close(self) -> None:
+        """Unmaps the index file.
+
+        Returns:
+            None
+        """
+        self._mmap.close()
+
+
+class SegmentedIndex(object):
+    """A hash index kept as a stack of segment files written by `write_index`.
+
+    An update is written as a new segment holding only the changed keys, so its cost
+    follows the size of the update rather than of the whole index. Lookups read the
+    newest segment holding a key. Once more than `max_segments` segments pile up,
+    they are merged into one.
+
+    Args:
+        directory (Path): The directory holding the segment files.
+        name (str): The name the segment files start with.
+        max_segments (int): The number of segments above which they are merged.
+            Defaults to 8.
+
+    Methods:
+        get(key): Returns the newest payload for a UUID.
+        keys(): Returns the UUIDs in any segment.
+        append(mapping): Writes a mapping of UUIDs to payloads as a new segment.
+        compact(): Merges the segments into one.
+        close(): Unmaps the segment files.
+    """
+
+    def __init__(self, directory: Path, name: str, max_segments: int = 8):
+        self.directory = Path(directory)
+        self.name = name
+        self.max_segments = max_segments
+        # Newest segment first
+        self._segments: List[Tuple[int, HashIndex]] = [
+            (sequence, HashIndex(self._segment_path(sequence)))
+            for sequence in sorted(self._sequences(), reverse=True)
+        ]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        return len(self._segments)
+
+    def _sequences(self) -> List[int]:
+        return [
+            int(path.name[len(self.name) + 1 : -len(".idx")])
+            for path in self.directory.glob(f"{self.name}.*.idx")
+        ]
+
+    def _segment_path(self, sequence: int) -> Path:
+        return self.directory / f"{self.name}.{sequence:06d}.idx"
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Returns the newest payload for a UUID.
+
+        Args:
+            key (str): The UUID string to look up.
+
+        Returns:
+            bytes: The payload, or None if the key is in no segment.
+        """
+        for _, segment in self._segments:
+            payload = segment.get(key)
+            if payload is not None:
+                return payload
+        return None
+
+    def keys(self) -> List[str]:
+        """Returns the UUIDs in any segment.
+
+        Returns:
+            list: The UUID strings, oldest segment first.
+        """
+        keys = {}
+        for _, segment in reversed(self._segments):
+            keys.update(dict.fromkeys(segment.keys()))
+        return list(keys)
+
+    def append(self, mapping: Dict[str, bytes]) -> None:
+        """Writes a mapping of UUIDs to payloads as a new segment.
+
+        Args:
+            mapping (dict): A mapping of UUID strings to their payloads. Nothing is
+                written if it is empty.
+
+        Returns:
+            None
+        """
+        if not mapping:
+            return
+        self._write_segment(mapping)
+        if len(self._segments) > self.max_segments:
+            self.compact()
+
+    def compact(self) -> None:
+        """Merges the segments into one, keeping the newest payload of each UUID.
+
+        Returns:
+            None
+        """
+        if len(self._segments) < 2:
+            return
+        merged = {}
+        for _, segment in reversed(self._segments):
+            for key in segment.keys():
+                merged[key] = segment.get(key)
+        stale = self._segments
+        self._segments = []
+        self._write_segment(merged, sequence=stale[0][0] + 1)
+        for sequence, segment in stale:
+            segment.close()
+            self._segment_path(sequence).unlink()
+
+    def _write_segment(
+        self, mapping: Dict[str, bytes], sequence: Optional[int] = None
+    ) -> None:
+        if sequence is None:
+            sequence = self._segments[0][0] + 1 if self._segments else 1
+        path = self._segment_path(sequence)
+        temporary_path = path.with_suffix(".tmp")
+        write_index(temporary_path, mapping)
+        temporary_path.replace(path)
+        self._segments.insert(0, (sequence, HashIndex(path)))
+
+    def close(self) -> None:
+        """Unmaps the segment files.
+
+        Returns:
+            None
+        """
+        for _, segment in self._segments:
+            segment.close()
+        self._segments = []
+
+
+class JoinIndex(object):
+    """Hash indexes joining communities, facilities, their inspections and the entries.
+
+    The indexes are built once by `build` and then opened with memory mapping, so
+    lookups by community, facility or report ID do not load or scan the crawled data.
+
+    Args:
+        directory (Path): The directory holding the index files.
+
+    Methods:
+        build(directory, facilities, inspection_details, inspection_reports): Builds the index files.
+        facility(facility_id): Returns the attributes of a facility.
+        inspections(facility_id): Returns the inspection report IDs of a facility.
+        entries(report_id): Returns the entries of an inspection report.
+        facilities_in(community): Returns the facility IDs in a community.
+        entries_in(community): Yields all entries for facilities in a community.
+        close(): Unmaps the index files.
+    """
+
+    def __init__(self, directory: Path):
+        directory = Path(directory)
+        self._facilities = HashIndex(directory / FACILITIES_FILENAME)
+        self._communities = HashIndex(directory / COMMUNITY_FACILITIES_FILENAME)
+        self._inspections = HashIndex(directory / FACILITY_INSPECTIONS_FILENAME)
+        self._entries = HashIndex(directory / REPORT_ENTRIES_FILENAME)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @staticmethod
+    def build(
+        directory: Path,
+        facilities: Iterable[Dict[str, Any]],
+        inspection_details: Iterable[Dict[str, List[Dict[str, Any]]]],
+        inspection_reports: Iterable[Dict[str, List[Tuple[str, Any]]]],
+    ) -> None:
+        """Builds the index files.
+
+        Args:
+            directory (Path): The directory to write the index files to.
+            facilities (iterable): The facility records.
+            inspection_details (iterable): Dictionaries mapping facility IDs to their
+                inspection reports, as consolidated from the inspection details crawl.
+            inspection_reports (iterable): Dictionaries mapping facility IDs to pairs of
+                report IDs and entries, as consolidated from the inspection reports crawl.
+
+        Returns:
+            None
+        """
+        directory = Path(directory)
+        facility_attributes = {}
+        community_facilities: Dict[str, List[str]] = {}
+        for facility in facilities:
+            facility_attributes[facility["id"]] = json.dumps(facility).encode("utf-8")
+            community_facilities.setdefault(facility["community"], []).append(
+                facility["id"]
+            )
+        write_index(directory / FACILITIES_FILENAME, facility_attributes)
+        write_index(
+            directory / COMMUNITY_FACILITIES_FILENAME,
+            {
+                community_key(community): encode_ids(facility_ids)
+                for community, facility_ids in community_facilities.items()
+            },
+        )
+
+        facility_inspections = {}
+        for details in inspection_details:
+            for facility_id, reports in details.items():
+                facility_inspections[facility_id] = encode_ids(
+                    report["id"] for report in reports
+                )
+        write_index(directory / FACILITY_INSPECTIONS_FILENAME, facility_inspections)
+
+        report_entries = {}
+        for reports in inspection_reports:
+            for report_pairs in reports.values():
+                for report_id, entries in report_pairs:
+                    report_entries[report_id] = json.dumps(entries).encode("utf-8")
+        write_index(directory / REPORT_ENTRIES_FILENAME, report_entries)
+
+    def facility(self, facility_id: str) -> Optional[Dict[str, Any]]:
+        """Returns the attributes of a facility.
+
+        Args:
+            facility_id (str): The ID of the facility.
+
+        Returns:
+            dict: The facility record, or None if the facility is not indexed.
+        """
+        payload = self._facilities.get(facility_id)
+        return json.loads(payload) if payload is not None else None
+
+    def inspections(self, facility_id: str) -> List[str]:
+        """Returns the inspection report IDs of a facility.
+
+        Args:
+            facility_id (str): The ID of the facility.
+
+        Returns:
+            list: The inspection report IDs, empty if the facility is not indexed.
+        """
+        payload = self._inspections.get(facility_id)
+        return decode_ids(payload) if payload is not None else []
+
+    def entries(self, report_id: str) -> List[Dict[str, Any]]:
+        """Returns the entries of an inspection report.
+
+        Args:
+            report_id (str): The ID of the inspection report.
+
+        Returns:
+            list: The report entries, empty if the report is not indexed.
+        """
+        payload = self._entries.get(report_id)
+        return json.loads(payload) if payload is not None else []
+
+    def facilities_in(self, community: str) -> List[str]:
+        """Returns the facility IDs in a community.
+
+        Args:
+            community (str): The name of the community.
+
+        Returns:
+            list: The facility IDs, empty if the community is not indexed.
+        """
+        payload = self._communities.get(community_key(community))
+        return decode_ids(payload) if payload is not None else []
+
+    def entries_in(
+        self, community: str
+    ) -> Generator[Tuple[str, str, Dict[str, Any]], None, None]:
+        """Yields all entries for facilities in a community.
+
+        Args:
+            community (str): The name of the community.
+
+        Yields:
+            tuple: The facility ID, the report ID and the entry.
+        """
+        for facility_id in self.facilities_in(community):
+            for report_id in self.inspections(facility_id):
+                for entry in self.entries(report_id):
+                    yield facility_id, report_id, entry
+
+    def close(self) -> None:
+        """Unmaps the index files.
+
+        Returns:
+            None
+        """
+        self._facilities.close()
+        self._communities.close()
+        self._inspections.close()
+        self._entries.close()
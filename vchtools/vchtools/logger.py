@@ -1,28 +1,132 @@
+import json
+import queue
+import atexit
 import logging
-from typing import Optional, List
+import itertools
+
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional, List, Dict, Any
+
+STRUCTURED_FIELDS = ("id", "endpoint", "status", "latency", "attempt")
+
+
+class JSONFormatter(logging.Formatter):
+    """Formats log records as single-line JSON objects.
+
+    The structured fields in `STRUCTURED_FIELDS` are copied from the record when
+    they were passed through `extra`, so they can be filtered without parsing the
+    message.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Formats a log record as a JSON line.
+
+        Args:
+            record (logging.LogRecord): The record to format.
+
+        Returns:
+            str: The JSON encoded record.
+        """
+        line: Dict[str, Any] = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        for field in STRUCTURED_FIELDS:
+            if hasattr(record, field):
+                line[field] = getattr(record, field)
+        if record.exc_info:
+            line["exception"] = self.formatException(record.exc_info)
+        return json.dumps(line)
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps one in every `sample_every` records marked with `extra={"sampled": True}`.
+
+    Records that are not marked, such as errors, always pass. The decision is stored on
+    the record, so a filter shared by several handlers keeps or drops a record in all of them.
+
+    Args:
+        sample_every (int): The sampling interval. Defaults to 1, which keeps all records.
+    """
+
+    def __init__(self, sample_every: int = 1):
+        super().__init__()
+        self.sample_every = sample_every
+        self._counter = itertools.count()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "sampled", False):
+            return True
+        if not hasattr(record, "sample_kept"):
+            record.sample_kept = next(self._counter) % self.sample_every == 0
+        return record.sample_kept
+
+
+class LazyQueueHandler(QueueHandler):
+    """A queue handler that defers message formatting to the listener thread.
+
+    `QueueHandler.prepare` formats the message in the calling thread so records can
+    be pickled; the records here never leave the process, so they are enqueued as is.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
 
 
 def setup_logging(
-    log_level: int = logging.INFO, log_file: Optional[str] = None
+    log_level: int = logging.INFO,
+    log_file: Optional[str] = None,
+    structured: bool = False,
+    queued: bool = False,
+    sample_every: int = 1,
 ) -> None:
     """Set up logging configuration.
 
+    Like `logging.basicConfig`, this does nothing if the root logger already has
+    handlers. A queued writer is stopped, and its queue flushed, at interpreter exit.
+
     Args:
         log_level (int): The logging level to set. Defaults to logging.INFO.
         log_file (str): The path to the log file. If provided, logs will be written to this file.
             Defaults to None.
+        structured (bool): Whether to write records as JSON lines. Defaults to False.
+        queued (bool): Whether to hand records to a background writer thread instead of
+            writing them in the calling thread. Defaults to False.
+        sample_every (int): Keep one in every `sample_every` records that are marked as
+            sampled, such as per-ID success messages. Defaults to 1.
 
     Returns:
         None
     """
+    if logging.root.handlers:
+        return
+
     handlers: List[logging.Handler] = [logging.StreamHandler()]
     if log_file:
         handlers.append(
             logging.FileHandler(filename=log_file, mode="w", encoding="utf-8")
         )
 
-    logging.basicConfig(
-        level=log_level,
-        format="%(asctime)s - %(levelname)s - %(message)s",
-        handlers=handlers,
+    formatter = (
+        JSONFormatter()
+        if structured
+        else logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
     )
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    if queued:
+        listener = QueueListener(
+            queue.SimpleQueue(), *handlers, respect_handler_level=True
+        )
+        handlers = [LazyQueueHandler(listener.queue)]
+        listener.start()
+        atexit.register(listener.stop)
+
+    if sample_every > 1:
+        sampling_filter = SamplingFilter(sample_every)
+        for handler in handlers:
+            handler.addFilter(sampling_filter)
+
+    logging.basicConfig(level=log_level, handlers=handlers)
@@ -0,0 +1,191 @@
+import json
+import logging
+import threading
+import tracemalloc
+
+from time import perf_counter, process_time
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Optional, Generator, List, Dict, Any
+
+
+class StageStats(object):
+    """The measurements of a profiled stage.
+
+    Attributes:
+        name (str): The name of the stage.
+        calls (int): The number of times the stage ran.
+        wall (float): The total wall time in seconds.
+        cpu (float): The total CPU time in seconds.
+        peak_memory (int): The peak traced memory in bytes, if memory was traced.
+        records (int): The number of records processed, as reported by the caller.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.peak_memory: Optional[int] = None
+        self.records = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the measurements as a dictionary.
+
+        Returns:
+            dict: The measurements, including the record throughput.
+        """
+        return {
+            "stage": self.name,
+            "calls": self.calls,
+            "wall": self.wall,
+            "cpu": self.cpu,
+            "peakMemory": self.peak_memory,
+            "records": self.records,
+            "recordsPerSecond": self.records / self.wall if self.wall else None,
+        }
+
+
+class Profiler(object):
+    """Attributes wall time, CPU time and peak memory to the stages of a run.
+
+    Stages are measured with `stage`, which times a block of code and tracks its peak
+    memory with tracemalloc. Work that happens on worker threads, such as requests and
+    response decoding, is accumulated with `record`. A disabled profiler turns both
+    into no-ops, so stages can be marked unconditionally. Stages must be entered from
+    the main thread.
+
+    Args:
+        enabled (bool): Whether to take measurements. Defaults to True.
+        stats_path (Path): The path to write cProfile statistics of the main thread to,
+            for use with `pstats` or snakeviz. Defaults to None.
+
+    Methods:
+        stage(name): Context manager measuring a stage.
+        record(name, wall, cpu, records): Accumulates a measurement taken elsewhere.
+        report(): Returns the measurements of all stages.
+        write_report(path): Writes the measurements as JSON and logs a summary.
+    """
+
+    def __init__(self, enabled: bool = True, stats_path: Optional[Path] = None):
+        self.enabled = enabled
+        self.stats_path = stats_path
+        self.stages: Dict[str, StageStats] = {}
+        self._lock = threading.Lock()
+        self._peaks: List[int] = []
+        self._cprofile = None
+
+        if enabled:
+            tracemalloc.start()
+            if stats_path is not None:
+                import cProfile
+
+                self._cprofile = cProfile.Profile()
+                self._cprofile.enable()
+
+    def _stats(self, name: str) -> StageStats:
+        if name not in self.stages:
+            self.stages[name] = StageStats(name)
+        return self.stages[name]
+
+    @contextmanager
+    def stage(self, name: str) -> Generator[StageStats, None, None]:
+        """Context manager measuring a stage.
+
+        Nested stages are supported; the peak memory of a stage includes the peaks of
+        the stages nested in it.
+
+        Args:
+            name (str): The name of the stage.
+
+        Yields:
+            StageStats: The stage measurements. Set `records` to report throughput.
+        """
+        with self._lock:
+            stats = self._stats(name)
+        if not self.enabled:
+            yield stats
+            return
+
+        self._peaks.append(0)
+        tracemalloc.reset_peak()
+        wall, cpu = perf_counter(), process_time()
+        try:
+            yield stats
+        finally:
+            wall, cpu = perf_counter() - wall, process_time() - cpu
+            peak = max(self._peaks.pop(), tracemalloc.get_traced_memory()[1])
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], peak)
+            tracemalloc.reset_peak()
+
+            with self._lock:
+                stats.calls += 1
+                stats.wall += wall
+                stats.cpu += cpu
+                stats.peak_memory = max(stats.peak_memory or 0, peak)
+
+    def record(self, name: str, wall: float, cpu: float, records: int = 1) -> None:
+        """Accumulates a measurement taken elsewhere, such as on a worker thread.
+
+        Measurements from concurrent threads add up, so the wall time of a recorded
+        stage can exceed the wall time of the stage it ran in.
+
+        Args:
+            name (str): The name of the stage.
+            wall (float): The wall time in seconds.
+            cpu (float): The CPU time in seconds.
+            records (int): The number of records processed. Defaults to 1.
+
+        Returns:
+            None
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            stats = self._stats(name)
+            stats.calls += 1
+            stats.wall += wall
+            stats.cpu += cpu
+            stats.records += records
+
+    def report(self) -> List[Dict[str, Any]]:
+        """Returns the measurements of all stages.
+
+        Returns:
+            list: The measurements of each stage, in the order the stages first ran.
+        """
+        with self._lock:
+            return [stats.to_dict() for stats in self.stages.values()]
+
+    def write_report(self, path: Optional[Path] = None) -> None:
+        """Writes the measurements as JSON and logs a summary.
+
+        Stops memory tracing and, if enabled, writes the cProfile statistics.
+
+        Args:
+            path (Path): The path of the JSON report. Defaults to None, which only logs.
+
+        Returns:
+            None
+        """
+        if not self.enabled:
+            return
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(self.stats_path)
+        tracemalloc.stop()
+
+        report = self.report()
+        for stage in report:
+            logging.info(
+                "Stage %s: %.3fs wall, %.3fs CPU, peak memory %s bytes, %d records.",
+                stage["stage"],
+                stage["wall"],
+                stage["cpu"],
+                stage["peakMemory"],
+                stage["records"],
+            )
+        if path is not None:
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2)
@@ -0,0 +1,158 @@
+import json
+from pathlib import Path
+from typing import Iterable, Union, List, Dict, Any
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+class Projection(object):
+    """A set of fields to keep from the records of API responses.
+
+    Fields are given as dotted paths, such as "category.description". Naming a field
+    keeps it whole, while naming a nested path keeps only that path of its parent.
+    Records are the objects with an "id" key; their "id" is always kept. Objects
+    without an "id" key, such as response envelopes, are kept whole and searched for
+    records.
+
+    Documents in memory are decoded with `json.loads` and then projected. Projecting
+    adds to the cost of the decode; it pays off in the smaller data that is kept,
+    written and read again downstream. Files holding a list are streamed with `ijson`
+    when it is installed, so only one item is decoded whole at a time.
+
+    Args:
+        fields (iterable): The dotted paths of the fields to keep.
+
+    Attributes:
+        fields (tuple): The dotted paths of the fields to keep.
+        tree (dict): The fields as a tree of key names, where None keeps a value whole.
+
+    Methods:
+        from_schema(schema_path, fields): Builds a projection validated against a JSON schema.
+        top_level_fields(): Returns the projected top-level field names.
+        apply(data): Projects the records in decoded data.
+        loads(data): Decodes a JSON document with the projection applied.
+        load(f): Decodes a JSON file with the projection applied.
+    """
+
+    def __init__(self, fields: Iterable[str]):
+        self.fields = tuple(fields)
+        self.tree: Dict[str, Any] = {"id": None}
+        for field in self.fields:
+            node = self.tree
+            *parents, leaf = field.split(".")
+            for name in parents:
+                if name in node and node[name] is None:
+                    break
+                node = node.setdefault(name, {})
+            else:
+                node[leaf] = None
+
+    def __repr__(self):
+        return f"Projection({list(self.fields)!r})"
+
+    @classmethod
+    def from_schema(
+        cls, schema_path: Union[str, Path], fields: Iterable[str]
+    ) -> "Projection":
+        """Builds a projection validated against a JSON schema.
+
+        Args:
+            schema_path (Path): The path to a JSON schema, such as those in `vchtools/schemas/`.
+            fields (iterable): The dotted paths of the fields to keep.
+
+        Returns:
+            Projection: The projection.
+
+        Raises:
+            ValueError: If a field is not a property of the schema.
+        """
+        with open(schema_path, "r") as f:
+            schema = json.load(f)
+
+        fields = tuple(fields)
+        for field in fields:
+            node = schema
+            for name in field.split("."):
+                node = node.get("items", node)
+                properties = node.get("properties", {})
+                if name not in properties:
+                    raise ValueError(
+                        f"Field {field!r} is not in the schema {schema['title']!r}."
+                    )
+                node = properties[name]
+        return cls(fields)
+
+    def top_level_fields(self) -> List[str]:
+        """Returns the projected top-level field names.
+
+        Returns:
+            list: The field names, suitable for the "fields" list of a listing payload.
+        """
+        return list(dict.fromkeys(field.split(".")[0] for field in self.fields))
+
+    def apply(self, data: Any) -> Any:
+        """Projects the records in decoded data.
+
+        Args:
+            data (Any): The decoded data, such as a response or a list of responses.
+
+        Returns:
+            Any: The data with only the projected fields of each record.
+        """
+        if isinstance(data, list):
+            return [self.apply(item) for item in data]
+        if not isinstance(data, dict):
+            return data
+        if "id" in data:
+            return _project(data, self.tree)
+        return {key: self.apply(value) for key, value in data.items()}
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        """Decodes a JSON document with the projection applied.
+
+        Args:
+            data (str): The JSON document.
+
+        Returns:
+            Any: The decoded document.
+        """
+        return self.apply(json.loads(data))
+
+    def load(self, f) -> Any:
+        """Decodes a JSON file with the projection applied.
+
+        When the `ijson` package is installed and the document is a list, its items
+        are parsed and projected one at a time, so the peak memory follows the size of
+        an item rather than of the file. Other documents are decoded whole first.
+
+        Args:
+            f (file): A file object opened for reading in binary mode.
+
+        Returns:
+            Any: The decoded document.
+        """
+        if ijson is None or not _is_list(f):
+            return self.apply(json.load(f))
+        return [self.apply(item) for item in ijson.items(f, "item", use_float=True)]
+
+
+def _is_list(f) -> bool:
+    start = f.tell()
+    head = f.read(64).lstrip()
+    f.seek(start)
+    return head[:1] in (b"[", "[")
+
+
+def _project(value: Any, tree: Dict[str, Any]) -> Any:
+    if isinstance(value, list):
+        return [_project(item, tree) for item in value]
+    if not isinstance(value, dict):
+        return value
+    return {
+        key: item if tree[key] is None else _project(item, tree[key])
+        for key, item in value.items()
+        if key in tree
+    }